@@ -0,0 +1,151 @@
+"""Перебор с альфа-бета отсечениями"""
+
+from array import array
+from random import Random
+from time import perf_counter
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+WIN = 1 << 30
+
+
+class Timeout(Exception):
+    pass
+
+
+class Search:
+    """Негамакс с альфа-бета отсечениями и итеративным углублением на
+    Evaluator: ходы делаются через play и отменяются через undo. Ходы
+    упорядочиваются по таблице транспозиций, ходам-убийцам, истории
+    отсечений и сумме двойных расстояний клетки для обоих цветов.
+    При width рассматриваются только width лучших по этому порядку ходов"""
+
+    def __init__(self, evaluator, table=None, width=None, rng=None):
+        self.evaluator = evaluator
+        self.table = table or TranspositionTable()
+        self.width = width
+        self.rng = rng or Random()
+        count = evaluator.layout.count
+        self.history = {colour: array('i', bytes(4 * count))
+                        for colour in (1, 2)}
+        self.killers = []
+        self.nodes = 0
+        self.depth = 0
+        self.best = None, 0
+        self.deadline = None
+        self.cancel = None
+
+    def run(self, colour, time_limit=None, depth=None, cancel=None):
+        """Лучший ход цвета colour и его оценка. Углубление идёт, пока не
+        кончится время, не будет достигнута глубина depth или не выставлен
+        cancel. Прерванная итерация не учитывается"""
+        evaluator = self.evaluator
+        free = [k for k, stone in enumerate(evaluator.board.stones)
+                if not stone]
+        if not free or evaluator.board.winner:
+            return None, 0
+        self.deadline = (None if time_limit is None else
+                         perf_counter() + time_limit)
+        self.cancel = cancel
+        self.nodes = 0
+        self.table.new_search()
+        for history in self.history.values():
+            for k in range(len(history)):
+                history[k] >>= 1
+        limit = len(free) if depth is None else min(depth, len(free))
+
+        self.best = self._order(free, colour, -1, 0)[0], 0
+        best = self.best
+        for depth in range(1, limit + 1):
+            self.depth = depth
+            try:
+                self._negamax(depth, -WIN, WIN, colour, 0)
+            except Timeout:
+                break
+            best = self.best
+            if abs(best[1]) >= WIN - len(free):
+                break
+        return best
+
+    def _check_time(self):
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise Timeout
+        if self.cancel is not None and self.cancel.is_set():
+            raise Timeout
+
+    def _order(self, moves, colour, first, ply):
+        distances = self.evaluator.distances
+        own_start, own_finish = distances[colour]
+        other_start, other_finish = distances[3 - colour]
+        history = self.history[colour]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        self.rng.shuffle(moves)
+        moves.sort(key=lambda k: (
+            k != first, k not in killers, -history[k],
+            own_start[k] + own_finish[k] + other_start[k] + other_finish[k]))
+        if self.width is not None:
+            del moves[self.width:]
+        return moves
+
+    def _negamax(self, depth, alpha, beta, colour, ply):
+        self.nodes += 1
+        self._check_time()
+        evaluator = self.evaluator
+        board = evaluator.board
+        if depth == 0:
+            return evaluator.evaluate(colour)
+
+        key = board.hash
+        entry = self.table.get(key)
+        first = -1
+        if entry is not None:
+            entry_depth, value, flag, first = entry
+            if entry_depth >= depth and ply:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        moves = [k for k, stone in enumerate(board.stones) if not stone]
+        if not moves:
+            return 0
+        moves = self._order(moves, colour, first, ply)
+        while len(self.killers) <= ply:
+            self.killers.append([-1, -1])
+
+        start = alpha
+        best_value = -WIN
+        best_move = moves[0]
+        for move in moves:
+            winner = evaluator.play(move, colour)
+            try:
+                if winner:
+                    value = WIN - ply - 1
+                else:
+                    value = -self._negamax(depth - 1, -beta, -alpha,
+                                           3 - colour, ply + 1)
+            finally:
+                evaluator.undo()
+            if value > best_value:
+                best_value = value
+                best_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                killers = self.killers[ply]
+                if move != killers[0]:
+                    killers[1], killers[0] = killers[0], move
+                self.history[colour][move] += depth * depth
+                break
+
+        if best_value <= start:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(key, depth, best_value, flag, best_move)
+        if not ply:
+            self.best = best_move, best_value
+        return best_value
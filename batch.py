@@ -0,0 +1,105 @@
+"""Векторная оценка пачек позиций на NumPy
+
+Пачка позиций - массив формы (N, число клеток) с цветами камней (0, 1, 2)
+в порядке номеров клеток Layout, как Board.stones"""
+
+from functools import lru_cache
+import numpy as np
+from classes import get_layout
+
+SIDES = {1: '/', 2: '\\'}
+
+
+class BatchLayout:
+    """Массивы Layout для векторных операций. Таблица соседей дополнена
+    до шести номером фиктивной клетки count, которая всегда пуста"""
+
+    def __init__(self, size):
+        layout = get_layout(size)
+        self.size = size
+        self.count = layout.count
+        self.neighbours = np.full((layout.count, 6), layout.count,
+                                  dtype=np.intp)
+        for index, neighbours in enumerate(layout.neighbours):
+            self.neighbours[index, :len(neighbours)] = neighbours
+        self.edges = {}
+        for side, mask in layout.sides.items():
+            mask = np.frombuffer(bytes(mask), dtype=np.uint8)
+            self.edges[side] = (mask & 1 != 0, mask & 2 != 0)
+
+    def spread(self, values, fill):
+        """Значения соседей каждой клетки: массив (N, count, 6)"""
+        padded = np.concatenate(
+            [values, np.full((len(values), 1), fill, dtype=values.dtype)],
+            axis=1)
+        return padded[:, self.neighbours]
+
+
+@lru_cache(maxsize=None)
+def get_batch_layout(size):
+    return BatchLayout(size)
+
+
+def stack(games):
+    """Пачка позиций из списка Game одного размера"""
+    return np.stack([np.frombuffer(bytes(game.board.stones), dtype=np.uint8)
+                     for game in games])
+
+
+def legal_moves(boards):
+    return boards == 0
+
+
+def connected(boards, size, colour, side):
+    """Соединены ли стороны side камнями colour: маска (N,). Метки
+    достижимости от первой стороны распространяются по соседям, пока
+    не перестанут меняться"""
+    layout = get_batch_layout(size)
+    start, finish = layout.edges[side]
+    own = boards == colour
+    reached = own & start
+    while True:
+        spread = reached | layout.spread(reached, False).any(axis=2)
+        spread &= own
+        if np.array_equal(spread, reached):
+            break
+        reached = spread
+    return (reached & finish).any(axis=1)
+
+
+def winners(boards, size, sides=SIDES):
+    """Цвет соединившего свои стороны игрока для каждой позиции, иначе 0"""
+    result = np.zeros(len(boards), dtype=np.uint8)
+    result[connected(boards, size, 2, sides[2])] = 2
+    result[connected(boards, size, 1, sides[1])] = 1
+    return result
+
+
+def distances(boards, size, colour, side):
+    """Сколько пустых клеток не хватает цвету colour до соединения сторон
+    side (кратчайший путь, свои камни бесплатны, чужие непроходимы):
+    массив (N,), inf если путь закрыт"""
+    layout = get_batch_layout(size)
+    start, finish = layout.edges[side]
+    cost = np.where(boards == colour, 0.0, 1.0)
+    cost[(boards != 0) & (boards != colour)] = np.inf
+    distance = np.where(start, cost, np.inf)
+    while True:
+        nearest = layout.spread(distance, np.inf).min(axis=2)
+        relaxed = np.minimum(distance, nearest + cost)
+        if np.array_equal(relaxed, distance):
+            break
+        distance = relaxed
+    return np.where(finish, distance, np.inf).min(axis=1)
+
+
+def features(boards, size, sides=SIDES):
+    """Простые признаки позиций: массив (N, 5) из числа камней каждого
+    цвета, расстояний до соединения каждого цвета и победителя"""
+    return np.stack([
+        (boards == 1).sum(axis=1),
+        (boards == 2).sum(axis=1),
+        distances(boards, size, 1, sides[1]),
+        distances(boards, size, 2, sides[2]),
+        winners(boards, size, sides),
+    ], axis=1).astype(float)
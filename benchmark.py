@@ -0,0 +1,321 @@
+"""Замеры скорости основных операций на полях разных размеров"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from itertools import cycle
+from random import Random
+from timeit import Timer
+from classes import Game, get_layout, get_valid_rounded_coordinates
+from evaluation import Evaluator
+from records import GameRecord
+from mcts import playout
+
+SIZES = [5, 11, 19, 50, 100, 150]
+IMPORTS = ['classes', 'players', 'tournament', 'graphics']
+SIDES = {1: '/', 2: '\\'}
+
+
+def _get_moves(game, seed):
+    moves = [*game.cells.keys()]
+    Random(seed).shuffle(moves)
+    return moves
+
+
+def bench_init(size):
+    return lambda: Game(size), 1
+
+
+def bench_make_step(size):
+    moves = _get_moves(Game(size), size)
+
+    def run():
+        game = Game(size)
+        for k, (x, y) in enumerate(moves):
+            game = game.make_step(x, y, '/\\'[k % 2])
+
+    return run, len(moves)
+
+
+def bench_replay(size):
+    """Воспроизведение записи партии на месте, на ход"""
+    game = Game(size)
+    record = GameRecord(size, [game.layout.index[coords]
+                               for coords in _get_moves(game, size)])
+    return record.replay, len(record)
+
+
+def bench_get_neighbours(size):
+    game = Game(size)
+    cells = [*game.cells.keys()]
+
+    def run():
+        for x, y in cells:
+            for _ in game.get_neighbours(x, y):
+                pass
+
+    return run, len(cells)
+
+
+def bench_rounded_coordinates(size):
+    game = Game(size)
+    rng = Random(size)
+    points = [(rng.uniform(-1, 2 * size), rng.uniform(-1, size))
+              for _ in range(1000)]
+
+    def run():
+        for x, y in points:
+            for _ in get_valid_rounded_coordinates(x, y, game):
+                pass
+
+    return run, len(points)
+
+
+def bench_playout(size):
+    board = Game(size).board
+    rng = Random(size)
+    return lambda: playout(board.layout, board.stones, 1, SIDES, rng), 1
+
+
+def bench_evaluate(size):
+    """Ход с инкрементальным пересчётом оценки и его отмена"""
+    game = Game(size)
+    moves = _get_moves(game, size)[:size * size // 2]
+    for x, y in moves[:-1]:
+        game = game.make_step(x, y, SIDES[game.colour])
+    evaluator = Evaluator.from_game(game, SIDES)
+    index = game.layout.index[moves[-1]]
+    colour = game.colour
+
+    def run():
+        evaluator.play(index, colour)
+        evaluator.evaluate(colour)
+        evaluator.undo()
+
+    return run, 1
+
+
+def bench_ai(size):
+    """Партия случайных игроков с фиксированными зёрнами, на ход"""
+    from players import AI
+
+    sides = {'One': '/', 'Two': '\\'}
+
+    def run():
+        game = Game(size, 'One', 'Two')
+        players = (AI('One', game, seed=size), AI('Two', game, seed=-size))
+        for k in range(game.layout.count):
+            game = players[k % 2].make_step(game, sides)
+
+    return run, get_layout(size).count
+
+
+def bench_paint(size):
+    """Отрисовка Gui.paintEvent без экрана (платформа Qt offscreen)"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from PyQt5.QtGui import QPixmap
+    from graphics import Gui
+    from players import AI
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    game = Game(size, 'One', 'Two')
+    for k, (x, y) in enumerate(_get_moves(game, size)[:size * size // 2]):
+        game = game.make_step(x, y, '/\\'[k % 2])
+    players = (AI('One', game), AI('Two', game))
+    gui = Gui(game, players, max(5, 600 // (2 * size)), None)
+    gui.stop()
+    pixmap = QPixmap(gui.size())
+
+    def run():
+        gui.render(pixmap)
+        app.processEvents()
+
+    return run, 1
+
+
+def bench_paint_view(size):
+    """Отрисовка видимой в окне части большого поля с крупными клетками"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from PyQt5.QtCore import QPoint, QRect
+    from PyQt5.QtGui import QPixmap, QRegion
+    from graphics import Gui
+    from players import AI
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    game = Game(size, 'One', 'Two')
+    for k, (x, y) in enumerate(_get_moves(game, size)[:size * size // 2]):
+        game = game.make_step(x, y, '/\\'[k % 2])
+    players = (AI('One', game), AI('Two', game))
+    gui = Gui(game, players, 25, None)
+    gui.stop()
+    view = QRect(gui.width() // 2, gui.height() // 2, 1280, 720)
+    region = QRegion(view & gui.rect())
+    pixmap = QPixmap(view.size())
+
+    def run():
+        gui.render(pixmap, QPoint(), region)
+        app.processEvents()
+
+    return run, 1
+
+
+def bench_paint_zoom(size):
+    """Шаг масштаба колесом мыши с отрисовкой видимой части поля"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from PyQt5.QtCore import QPoint, QRect
+    from PyQt5.QtGui import QPixmap, QRegion
+    from graphics import Gui, ZOOM_STEP
+    from players import AI
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    game = Game(size, 'One', 'Two')
+    for k, (x, y) in enumerate(_get_moves(game, size)[:size * size // 2]):
+        game = game.make_step(x, y, '/\\'[k % 2])
+    players = (AI('One', game), AI('Two', game))
+    gui = Gui(game, players, 25, None)
+    gui.stop()
+    pixmap = QPixmap(1280, 720)
+    scales = [ZOOM_STEP ** -k for k in range(12)]
+    scales = cycle(scales + scales[-2:0:-1])
+
+    def run():
+        gui.set_scale(next(scales), QPoint())
+        region = QRegion(QRect(0, 0, 1280, 720) & gui.rect())
+        gui.render(pixmap, QPoint(), region)
+        app.processEvents()
+
+    return run, 1
+
+
+BENCHMARKS = {
+    'init': bench_init,
+    'make_step': bench_make_step,
+    'replay': bench_replay,
+    'get_neighbours': bench_get_neighbours,
+    'rounded_coordinates': bench_rounded_coordinates,
+    'playout': bench_playout,
+    'evaluate': bench_evaluate,
+    'ai': bench_ai,
+    'paint': bench_paint,
+    'paint_view': bench_paint_view,
+    'paint_zoom': bench_paint_zoom,
+}
+
+
+def measure(run, operations, repeat=5, min_time=0.2):
+    """Лучшее время одной операции в секундах"""
+    timer = Timer(run)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number / operations
+
+
+def run_benchmarks(names, sizes, repeat=5, min_time=0.2):
+    results = {}
+    for name in names:
+        for size in sizes:
+            try:
+                run, operations = BENCHMARKS[name](size)
+            except ImportError:
+                break
+            results[f'{name}/{size}'] = measure(run, operations, repeat,
+                                                min_time)
+    return results
+
+
+def measure_import(module, repeat=5):
+    """Лучшее время импорта модуля в новом процессе (по -X importtime,
+    без запуска интерпретатора) в секундах или None, если он не
+    импортируется"""
+    best = None
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=directory, capture_output=True, text=True)
+        if process.returncode:
+            return None
+        for line in process.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module and \
+                    not fields[2][1:].startswith(' '):
+                value = int(fields[1]) / 1e6
+                best = value if best is None else min(best, value)
+    return best
+
+
+def measure_imports(modules, repeat=5):
+    results = {}
+    for module in modules:
+        value = measure_import(module, repeat)
+        if value is not None:
+            results[f'import/{module}'] = value
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Замеры, которые медленнее базовых больше чем в 1 + tolerance раз"""
+    regressions = {}
+    for key, value in results.items():
+        base = baseline.get(key)
+        if base and value > base * (1 + tolerance):
+            regressions[key] = value / base
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        usage='%(prog)s [OPTIONS]',
+        description='Nex benchmarks')
+    parser.add_argument('--sizes', '-n', type=int, nargs='+', default=SIZES,
+                        help='Field sizes')
+    parser.add_argument('--bench', '-b', type=str, nargs='+',
+                        default=[*BENCHMARKS], choices=[*BENCHMARKS],
+                        help='Benchmarks to run')
+    parser.add_argument('--imports', type=str, nargs='*', default=IMPORTS,
+                        help='Modules to measure cold import time of')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Repeats of every measurement')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Seconds per repeat')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='JSON file for results (stdout by default)')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='JSON file with results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.bench, args.sizes, args.repeat,
+                             args.min_time)
+    results.update(measure_imports(args.imports, args.repeat))
+    report = {'python': platform.python_version(),
+              'machine': platform.machine(),
+              'results': results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)['results'],
+                                  args.tolerance)
+        for key, ratio in sorted(regressions.items()):
+            print(f'{key}: {ratio:.2f}x slower than baseline',
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Дебютная книга и решённые позиции в файле, отображённом в память"""
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from classes import get_layout
+
+MAGIC = b'NEXBOOK1'
+HEADER = 16
+BOOK, SOLVED = 0, 1
+SIDES = {1: '/', 2: '\\'}
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'nex.book')
+
+
+@lru_cache(maxsize=None)
+def get_symmetries(size):
+    """Перестановки клеток, сохраняющие соседство клеток и стороны
+    (с обменом '0' и '='). Первая - тождественная. Поворот на 180°
+    добавляется, только если соседство Layout его допускает"""
+    layout = get_layout(size)
+    identity = tuple(range(layout.count))
+
+    def get_length(i):
+        return i + 1 if i < size else 2 * size - i - 1
+
+    rotation = tuple(layout.index[2 * size - 2 - i, get_length(i) - 1 - j]
+                     for i, j in layout.coordinates)
+    if rotation == identity:
+        return identity,
+    for k, neighbours in enumerate(layout.neighbours):
+        if ({rotation[n] for n in neighbours} !=
+                set(layout.neighbours[rotation[k]])):
+            return identity,
+    for mask in layout.sides.values():
+        for k in range(layout.count):
+            bits = mask[k]
+            if mask[rotation[k]] != (bits >> 1) | ((bits & 1) << 1):
+                return identity,
+    return identity, rotation
+
+
+def canonical(layout, stones):
+    """Ключ Зобриста позиции, наименьший по симметриям поля, и
+    перестановка клеток в канонический вид. Для тождественной
+    перестановки ключ совпадает с Board.hash"""
+    zobrist = layout.zobrist
+    turn = zobrist[-1] if sum(map(bool, stones)) % 2 else 0
+    best = None
+    for symmetry in get_symmetries(layout.size):
+        key = turn
+        for k, stone in enumerate(stones):
+            if stone:
+                key ^= zobrist[2 * symmetry[k] + stone - 1]
+        if best is None or key < best[0]:
+            best = key, symmetry
+    return best
+
+
+class Book:
+    """Книга в файле path, отображённом в память только для чтения.
+    Записи (ключ, ход, сумма побед, число партий, флаг) отсортированы по
+    ключу и читаются прямо из отображения двоичным поиском. Ходы и победы
+    записаны для цвета, который ходит, в канонических номерах клеток"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if view[:8] != MAGIC:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f'{path} is not a book file')
+        count = view[8:HEADER].cast('Q')[0]
+        self._views = [view]
+        offset = HEADER
+        for name, code, size in (('keys', 'Q', 8), ('moves', 'i', 4),
+                                 ('wins', 'f', 4), ('counts', 'I', 4),
+                                 ('flags', 'B', 1)):
+            column = view[offset:offset + size * count].cast(code)
+            setattr(self, name, column)
+            self._views.append(column)
+            offset += size * count
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        for k in range(len(self.keys)):
+            yield (self.keys[k], self.moves[k], self.wins[k],
+                   self.counts[k], self.flags[k])
+
+    def get(self, key):
+        """Записи позиции: список (ход, сумма побед, число партий, флаг)"""
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, start)
+        return [(self.moves[k], self.wins[k], self.counts[k], self.flags[k])
+                for k in range(start, end)]
+
+    def choose(self, layout, stones, min_count=1):
+        """Номер клетки хода из книги для позиции stones или None.
+        Решённые позиции важнее статистики партий"""
+        key, symmetry = canonical(layout, stones)
+        best = None
+        for move, wins, count, flag in self.get(key):
+            if flag == SOLVED:
+                score = (2, wins)
+            elif count >= min_count:
+                score = (1, wins / count)
+            else:
+                continue
+            if best is None or score > best[0]:
+                best = score, move
+        if best is None:
+            return None
+        return symmetry.index(best[1])
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def get_book(path):
+    """Открытая книга по пути path, None если пути или файла нет"""
+    if not path or not os.path.exists(path):
+        return None
+    return Book(path)
+
+
+def read_entries(path):
+    """Записи файла книги {(ключ, ход): [победы, партии, флаг]}"""
+    if not os.path.exists(path):
+        return {}
+    with Book(path) as book:
+        return {(key, move): [wins, count, flag]
+                for key, move, wins, count, flag in book}
+
+
+def write_entries(path, entries):
+    """Записывает книгу целиком через временный файл"""
+    items = sorted(entries.items())
+    columns = (array('Q', [key for (key, _), _ in items]),
+               array('i', [move for (_, move), _ in items]),
+               array('f', [value[0] for _, value in items]),
+               array('I', [value[1] for _, value in items]),
+               array('B', [value[2] for _, value in items]))
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC)
+        array('Q', [len(items)]).tofile(file)
+        for column in columns:
+            column.tofile(file)
+    os.replace(temporary, path)
+    get_book.cache_clear()
@@ -0,0 +1,104 @@
+"""Построение и пополнение дебютной книги партиями компьютерных игроков"""
+
+import argparse
+import sys
+from alphabeta import WIN, Search
+from book import (BOOK, DEFAULT_PATH, SIDES, SOLVED, canonical, read_entries,
+                  write_entries)
+from classes import Board, get_layout
+from evaluation import Evaluator
+from tournament import ROLES, get_record, run as run_games
+from transposition import TranspositionTable
+
+
+def add_game(entries, size, record, winner, plies):
+    """Добавляет в записи первые plies ходов партии record (номера
+    клеток по очереди, первым ходит цвет 1). winner - цвет или 0"""
+    layout = get_layout(size)
+    stones = bytearray(layout.count)
+    for ply, index in enumerate(record[:plies]):
+        colour = 1 + ply % 2
+        key, symmetry = canonical(layout, stones)
+        value = entries.setdefault((key, symmetry[index]), [0.0, 0, BOOK])
+        if value[2] == BOOK:
+            value[0] += 1.0 if winner == colour else 0.5 if not winner else 0
+            value[1] += 1
+        stones[index] = colour
+
+
+def solve(entries, size, stones, colour, table=None):
+    """Точный перебор позиции: лучший ход записывается как решённый с
+    результатом 1 (победа цвета colour), 0.5 (ничья) или 0. Возвращает
+    результат или None, если ходить некуда"""
+    board = Board.from_stones(size, stones, SIDES)
+    move, value = Search(Evaluator(board, SIDES), table).run(colour)
+    if move is None:
+        return None
+    key, symmetry = canonical(board.layout, stones)
+    result = 1.0 if value > WIN // 2 else 0.0 if value < -WIN // 2 else 0.5
+    entries[key, symmetry[move]] = [result, 1, SOLVED]
+    return result
+
+
+def build(path, size, games, plies=8, solve_cells=0, roles=('MCTS', 'MCTS'),
+          workers=1, seed=0, options=None):
+    """Дополняет книгу path партиями компьютерных игроков. Позиции этих
+    партий, где свободно не больше solve_cells клеток, решаются точно"""
+    entries = read_entries(path)
+    layout = get_layout(size)
+    table = TranspositionTable()
+    solved = {key for (key, _), value in entries.items()
+              if value[2] == SOLVED}
+    for result in run_games(size, *roles, games, workers, seed,
+                            options=options, record=True):
+        record = get_record(result)
+        add_game(entries, size, record.moves, record.winner, plies)
+        for ply, (board, _, colour) in enumerate(record.positions()):
+            if layout.count - ply <= solve_cells:
+                key, _ = canonical(layout, board.stones)
+                if key not in solved:
+                    solved.add(key)
+                    solve(entries, size, board.stones, colour, table)
+    for entry, value in [*entries.items()]:
+        if value[2] == BOOK and entry[0] in solved:
+            del entries[entry]
+    write_entries(path, entries)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        usage='%(prog)s [OPTIONS]',
+        description='Build or extend the Nex opening book')
+    parser.add_argument('--field-size', '-n', type=int, default=5,
+                        help='Field size')
+    parser.add_argument('--games', '-g', type=int, default=100,
+                        help='Number of self-play games')
+    parser.add_argument('--plies', type=int, default=8,
+                        help='Moves of every game added to the book')
+    parser.add_argument('--solve-cells', type=int, default=0,
+                        help='Solve positions with at most this many '
+                             'free cells')
+    parser.add_argument('--role', '-r', type=str, default='MCTS',
+                        choices=ROLES, help='Self-play player role')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Processes (0 for all cores)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the first game')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='Seconds per move')
+    parser.add_argument('--output', '-o', type=str, default=DEFAULT_PATH,
+                        help='Book file, extended if it exists')
+    args = parser.parse_args(argv)
+
+    options = None
+    if args.time_limit is not None:
+        options = {'time_limit': args.time_limit}
+    count = build(args.output, args.field_size, args.games, args.plies,
+                  args.solve_cells, (args.role, args.role),
+                  args.workers or None, args.seed, options)
+    print(f'{args.output}: {count} entries', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
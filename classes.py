@@ -1,103 +1,440 @@
 """Основные классы"""
 
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
 from math import ceil, floor
 from itertools import product
-from copy import deepcopy
+from random import Random
 
 
-class Cell:
-    def __init__(self):
-        self.player = None
-        self._connected = set()
-        self._neighbours = set()
+SIDE_BITS = {'0': 1, '=': 2}
+CONNECTED = 3
 
-    def update_side(self, side):
-        if side in self._connected:
+
+def get_other_side(side):
+    return '\\' if side == '/' else '/'
+
+
+def get_changed_stones(stones, other_stones):
+    """Номера различающихся клеток двух массивов камней одного размера.
+    Различающиеся блоки ищутся делением пополам, совпадающие половины
+    отбрасываются одним сравнением"""
+    stones = bytes(stones)
+    other_stones = bytes(other_stones)
+    changed = []
+    blocks = [(0, len(stones))]
+    while blocks:
+        start, end = blocks.pop()
+        if stones[start:end] == other_stones[start:end]:
+            continue
+        if end - start <= 16:
+            changed.extend(k for k in range(start, end)
+                           if stones[k] != other_stones[k])
+        else:
+            middle = (start + end) // 2
+            blocks += (middle, end), (start, middle)
+    return changed
+
+
+class Layout:
+    """Разметка ромба: номера клеток, их соседи и клетки на сторонах.
+    Одна на каждый размер поля, см. get_layout. zobrist - ключи Зобриста:
+    2 * клетка + цвет - 1 для камней и последний для смены хода"""
+
+    dx_dy = [(-1, -1), (-1, 0), (0, -1), (0, 1), (1, 0), (1, 1)]
+
+    def __init__(self, size):
+        self.size = size
+        self.coordinates = []
+        for i in range(self.size * 2):
+            if i < self.size:
+                for j in range(i + 1):
+                    self.coordinates.append((i, j))
+            else:
+                for j in range(2 * self.size - i - 1):
+                    self.coordinates.append((i, j))
+        self.count = len(self.coordinates)
+        self.index = {coords: k for k, coords in enumerate(self.coordinates)}
+
+        self.neighbours = tuple(
+            tuple(self.index[x + dx, y + dy] for dx, dy in self.dx_dy
+                  if self.contains(x + dx, y + dy))
+            for x, y in self.coordinates)
+        self.neighbour_offsets = array('i', [0])
+        self.neighbour_indices = array('i')
+        for neighbours in self.neighbours:
+            self.neighbour_indices.extend(neighbours)
+            self.neighbour_offsets.append(len(self.neighbour_indices))
+
+        self.sides = {'/': bytearray(self.count),
+                      '\\': bytearray(self.count)}
+        for k, (x, y) in enumerate(self.coordinates):
+            if x < self.size and x == y:
+                self.sides['\\'][k] |= SIDE_BITS['=']
+            if x >= self.size - 1 and y == 0:
+                self.sides['\\'][k] |= SIDE_BITS['0']
+            if x < self.size and y == 0:
+                self.sides['/'][k] |= SIDE_BITS['0']
+            if x >= self.size - 1 and y == 2 * self.size - 2 - x:
+                self.sides['/'][k] |= SIDE_BITS['=']
+        self.edges = {
+            side: tuple([k for k in range(self.count) if mask[k] & bit]
+                        for bit in SIDE_BITS.values())
+            for side, mask in self.sides.items()}
+
+        rng = Random(size)
+        self.zobrist = array('Q', [rng.getrandbits(64)
+                                   for _ in range(2 * self.count + 1)])
+
+    def contains(self, x, y):
+        return (0 <= x < 2 * self.size and
+                ((0 <= y <= x < self.size) or
+                 (0 <= y < (2 * self.size - x - 1) and x >= self.size)))
+
+
+@lru_cache(maxsize=None)
+def get_layout(size):
+    return Layout(size)
+
+
+class Board:
+    """Изменяемое поле на плоских массивах с отменой ходов (make/unmake
+    для перебора). Клетки нумеруются по Layout, камни хранятся цветами
+    1 и 2, за клетками идут виртуальные узлы сторон '0' и '=' каждого
+    цвета в системе непересекающихся множеств"""
+
+    def __init__(self, size, players=('Player1', 'Player2')):
+        self.size = size
+        self.layout = get_layout(size)
+        self.players = players
+        count = self.layout.count
+
+        self.stones = bytearray(count)
+        self.parent = array('i', range(count + 4))
+        self.rank = bytearray(count + 4)
+        self.sides = bytearray(count) + bytes([1, 2, 1, 2])
+
+        self.moves = []
+        self.winner = 0
+        self.hash = 0
+        self.version = None
+        self._trail = []
+        self._marks = []
+
+    @classmethod
+    def from_stones(cls, size, stones, sides, players=('Player1', 'Player2')):
+        """Поле по компактной записи: массив цветов камней и стороны
+        цветов {1: '/', 2: '\\'}. История ходов у такого поля пустая"""
+        board = cls(size, players)
+        for index, stone in enumerate(stones):
+            if stone:
+                board.play(index, sides[stone], stone)
+        board.moves.clear()
+        board._trail.clear()
+        board._marks.clear()
+        return board
+
+    def play(self, index, side, colour):
+        trail = self._trail
+        self._marks.append(len(trail))
+        self.moves.append((index, side, colour, self.winner))
+
+        stones = self.stones
+        stones[index] = colour
+        self.hash ^= (self.layout.zobrist[2 * index + colour - 1] ^
+                      self.layout.zobrist[-1])
+        edges = self.layout.sides.get(side)
+        mask = edges[index] if edges else 0
+        edge = self.layout.count + 2 * (colour - 1)
+        if mask & 1:
+            self._union(index, edge, trail)
+        if mask & 2:
+            self._union(index, edge + 1, trail)
+        for neighbour in self.layout.neighbours[index]:
+            if stones[neighbour] == colour:
+                self._union(index, neighbour, trail)
+        if not self.winner and self.sides[self.find(index)] == CONNECTED:
+            self.winner = colour
+        return self.winner
+
+    def undo(self):
+        index, _, colour, self.winner = self.moves.pop()
+        self.hash ^= (self.layout.zobrist[2 * index + colour - 1] ^
+                      self.layout.zobrist[-1])
+        mark = self._marks.pop()
+        trail = self._trail
+        while len(trail) > mark:
+            values, node, value = trail.pop()
+            values[node] = value
+        self.stones[index] = 0
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.size = self.size
+        board.layout = self.layout
+        board.players = self.players
+        board.stones = self.stones[:]
+        board.parent = self.parent[:]
+        board.rank = self.rank[:]
+        board.sides = self.sides[:]
+        board.moves = []
+        board.winner = self.winner
+        board.hash = self.hash
+        board.version = None
+        board._trail = []
+        board._marks = []
+        return board
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    def _find(self, node, trail):
+        parent = self.parent
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            next_node = parent[node]
+            trail.append((parent, node, next_node))
+            parent[node] = root
+            node = next_node
+        return root
+
+    def _union(self, node, other, trail):
+        node = self._find(node, trail)
+        other = self._find(other, trail)
+        if node == other:
             return
-        self._connected.add(side)
-        for neib in self._neighbours:
-            neib.update_side(side)
+        rank = self.rank
+        if rank[node] < rank[other]:
+            node, other = other, node
+        trail.append((self.parent, other, other))
+        self.parent[other] = node
+        if rank[node] == rank[other]:
+            trail.append((rank, node, rank[node]))
+            rank[node] += 1
+        sides = self.sides
+        if sides[other] & ~sides[node]:
+            trail.append((sides, node, sides[node]))
+            sides[node] |= sides[other]
+
+    def get_player(self, index):
+        stone = self.stones[index]
+        return self.players[stone - 1] if stone else None
+
+    def sides_connected(self, index):
+        return (self.stones[index] != 0 and
+                self.sides[self.find(index)] == CONNECTED)
+
+
+class CellView:
+    """Клетка позиции: лёгкое представление поверх массивов Board"""
+
+    __slots__ = ('_game', '_index')
+
+    def __init__(self, game, index):
+        self._game = game
+        self._index = index
+
+    @property
+    def player(self):
+        return self._game.board.get_player(self._index)
 
     def sides_connected(self):
-        return '0' in self._connected and '=' in self._connected
+        return self._game.board.sides_connected(self._index)
+
+    def __eq__(self, other):
+        return (isinstance(other, CellView) and self._game is other._game
+                and self._index == other._index)
+
+    def __hash__(self):
+        return hash((id(self._game), self._index))
 
-    def add_link(self, neighbour):
-        if len(self._neighbours) > 5:
-            raise Exception("Too much neighbours")
-        self._neighbours.add(neighbour)
-        for side in self._connected:
-            neighbour.update_side(side)
 
-    def __str__(self):
-        return str(self._connected) + str(self._neighbours)
+class Cells(Mapping):
+    """Клетки позиции по координатам (i, j)"""
+
+    def __init__(self, game):
+        self._game = game
+        self._layout = game.layout
+
+    def __getitem__(self, key):
+        return CellView(self._game, self._layout.index[key])
+
+    def __iter__(self):
+        return iter(self._layout.coordinates)
+
+    def __len__(self):
+        return self._layout.count
 
 
 class Game:
+    """Неизменяемая позиция. Все позиции одной партии делят общее поле
+    Board, которое перед обращением откатывается или доигрывается до
+    нужной позиции, поэтому ход стоит O(изменений), а не O(поля)"""
+
     def __init__(self, size, player1='Player1', player2='Player2'):
         self.size = size
-        self.cells = {}
 
         self.player1 = player1
         self.player2 = player2
 
         self.winner = None
-        self.dx_dy = [(-1, -1), (-1, 0), (0, -1), (0, 1), (1, 0), (1, 1)]
 
-        for i in range(self.size * 2):
-            if i < self.size:
-                for j in range(i + 1):
-                    self[i, j] = Cell()
-            else:
-                for j in range(2 * self.size - i - 1):
-                    self[i, j] = Cell()
+        self._board = Board(size, (player1, player2))
+        self._board.version = self
+        self._colour = 1
+        self._parent = None
+        self._move = None
+        self._depth = 0
 
-    def __getitem__(self, item):
-        return self.cells[item]
+    @property
+    def layout(self):
+        return self._board.layout
+
+    @property
+    def cells(self):
+        return Cells(self)
+
+    @property
+    def hash(self):
+        """Ключ Зобриста позиции: камни и очередь хода"""
+        return self.board.hash
+
+    @property
+    def colour(self):
+        """Цвет камней игрока, который ходит (1 или 2)"""
+        return self._colour
 
-    def __setitem__(self, key, value):
-        self.cells[key] = value
+    @property
+    def board(self):
+        """Общее поле в этой позиции. Ходы, сделанные на нём через
+        play, нужно отменить через undo до обращения к другим позициям"""
+        board = self._board
+        if board.version is not self:
+            self._checkout(board)
+        return board
+
+    def _checkout(self, board):
+        current = board.version
+        target = self
+        path = []
+        while target._depth > current._depth:
+            path.append(target)
+            target = target._parent
+        while current._depth > target._depth:
+            board.undo()
+            current = current._parent
+        while current is not target:
+            board.undo()
+            current = current._parent
+            path.append(target)
+            target = target._parent
+        for game in reversed(path):
+            board.play(*game._move)
+        board.version = self
+
+    def __getitem__(self, item):
+        return CellView(self, self._board.layout.index[item])
 
     def make_step(self, x, y, side):
-        if self[x, y].player:
+        board = self.board
+        index = board.layout.index[x, y]
+        if board.stones[index]:
             return self
 
-        player = self.player1
-        new_game = deepcopy(self)
+        new_game = Game.__new__(Game)
+        new_game.size = self.size
         new_game.player1, new_game.player2 = self.player2, self.player1
 
-        cell = new_game[x, y]
-        cell.player = player
-        if side == '\\':
-            if x < self.size and x == y:
-                cell.update_side('=')
-            if x >= self.size - 1 and y == 0:
-                cell.update_side('0')
-        if side == '/':
-            if x < self.size and y == 0:
-                cell.update_side('0')
-            if x >= self.size - 1 and y == 2 * self.size - 2 - x:
-                cell.update_side('=')
-        for neighbour in new_game.get_neighbours(x, y):
-            if neighbour.player == player:
-                cell.add_link(neighbour)
-                neighbour.add_link(cell)
-        if cell.sides_connected() and not new_game.winner:
-            new_game.winner = player
+        winner = board.play(index, side, self._colour)
+        board.version = new_game
+        new_game.winner = board.players[winner - 1] if winner else None
 
+        new_game._board = board
+        new_game._colour = 3 - self._colour
+        new_game._parent = self
+        new_game._move = (index, side, self._colour)
+        new_game._depth = self._depth + 1
         return new_game
 
+    @classmethod
+    def from_board(cls, board, colour=1):
+        """Позиция на готовом поле board, например после Board.play
+        при воспроизведении записи. colour - цвет того, кто ходит"""
+        game = cls.__new__(cls)
+        game.size = board.size
+        game.player1 = board.players[colour - 1]
+        game.player2 = board.players[2 - colour]
+        game.winner = board.players[board.winner - 1] if board.winner \
+            else None
+        game._board = board
+        board.version = game
+        game._colour = colour
+        game._parent = None
+        game._move = None
+        game._depth = 0
+        return game
+
+    def copy(self):
+        """Позиция с собственным полем, без общей истории"""
+        new_game = Game.__new__(Game)
+        new_game.size = self.size
+        new_game.player1 = self.player1
+        new_game.player2 = self.player2
+        new_game.winner = self.winner
+        new_game._board = self.board.copy()
+        new_game._board.version = new_game
+        new_game._colour = self._colour
+        new_game._parent = None
+        new_game._move = None
+        new_game._depth = 0
+        return new_game
+
+    def get_changed_cells(self, other):
+        """Номера клеток, в которых позиции self и other различаются"""
+        if other._parent is self:
+            return [other._move[0]]
+        if self._parent is other:
+            return [self._move[0]]
+        if self.layout is not other.layout:
+            return list(range(other.layout.count))
+        if self._board is other._board:
+            changed = self._get_path_changes(other)
+            if changed is not None:
+                return changed
+        return get_changed_stones(self.board.stones, other.board.stones)
+
+    def _get_path_changes(self, other):
+        """Изменившиеся клетки по ходам на пути между позициями одного
+        поля через общего предка, без обращения к полю. None, если
+        общего предка нет"""
+        branches = {}, {}
+        first, second = self, other
+        while first is not second:
+            if first._move is not None and first._depth >= second._depth:
+                branches[0][first._move[0]] = first._move[2]
+                first = first._parent
+            elif second._move is not None:
+                branches[1][second._move[0]] = second._move[2]
+                second = second._parent
+            else:
+                return None
+        return sorted(index for index in branches[0].keys() | branches[1]
+                      if branches[0].get(index) != branches[1].get(index))
+
     def get_neighbours(self, x, y):
-        for dx, dy in self.dx_dy:
-            if (0 <= x + dx < 2 * self.size and
-                    ((0 <= y + dy <= x + dx < self.size) or
-                     (0 <= y + dy < (2 * self.size - x - dx - 1) and dx + x >=
-                      self.size))):
-                yield self[(x + dx, y + dy)]
+        layout = self._board.layout
+        for index in layout.neighbours[layout.index[x, y]]:
+            yield CellView(self, index)
 
 
 def get_valid_rounded_coordinates(x, y, game):
+    index = get_layout(game.size).index
     for i, j in product({floor(x), ceil(x)}, {floor(y), ceil(y)}):
-        if (0 <= i < 2 * game.size and
-                ((0 <= j <= i < game.size) or
-                 (0 <= j < (2 * game.size - i - 1) and i >= game.size))):
+        if (i, j) in index:
             yield i, j
@@ -0,0 +1,336 @@
+"""Оценка позиций: двойное расстояние и электрическое сопротивление"""
+
+from array import array
+from heapq import heapify, heappop, heappush
+from math import inf, log
+from operator import add, mul
+
+SIDES = {1: '/', 2: '\\'}
+INF = 1 << 16
+_MISSING = object()
+
+
+class Evaluator:
+    """Оценка позиций на собственном поле board с ходами play/undo.
+    Для каждого цвета хранится граф: пустые клетки, группы камней этого
+    цвета, стянутые в корни Board, и две стороны поля, камни соперника
+    удалены. Двойные расстояния от сторон после хода пересчитываются
+    от клеток, соседство которых изменил ход, и расходятся дальше только
+    по клеткам, чьё значение изменилось. Напряжения для сопротивления
+    уточняются итерациями от предыдущего решения"""
+
+    def __init__(self, board, sides=SIDES, tolerance=1e-4, relaxation=1.6):
+        self.board = board
+        self.sides = sides
+        self.tolerance = tolerance
+        self.relaxation = relaxation
+        self.layout = board.layout
+        count = self.layout.count
+        self._trail = []
+        self._marks = []
+        self.graphs = {colour: self._build_graph(colour) for colour in (1, 2)}
+        self.distances = {colour: (array('i', [INF]) * count,
+                                   array('i', [INF]) * count)
+                          for colour in (1, 2)}
+        self.voltages = {colour: array('d', [0.5]) * (count + 4)
+                         for colour in (1, 2)}
+        empty = [k for k in range(count) if not board.stones[k]]
+        for colour in (1, 2):
+            reaches = {}
+            for edge in (0, 1):
+                self._update_distances(colour, edge, empty, reaches)
+        self._trail.clear()
+
+    @classmethod
+    def from_game(cls, game, sides=SIDES, **options):
+        return cls(game.copy().board, sides, **options)
+
+    def _edge(self, colour, edge):
+        """Узел стороны edge (0 или 1) цвета colour в графе"""
+        return self.board.find(self.layout.count + 2 * (colour - 1) + edge)
+
+    def _build_graph(self, colour):
+        board = self.board
+        layout = self.layout
+        stones = board.stones
+        mask = layout.sides[self.sides[colour]]
+        graph = {self._edge(colour, 0): {}, self._edge(colour, 1): {}}
+
+        def get_node(k):
+            if not stones[k]:
+                return k
+            return board.find(k) if stones[k] == colour else None
+
+        for k in range(layout.count):
+            node = get_node(k)
+            if node is None:
+                continue
+            graph.setdefault(node, {})
+            if stones[k]:
+                continue
+            for neighbour in layout.neighbours[k]:
+                other = get_node(neighbour)
+                if other is None or (neighbour < k and not stones[neighbour]):
+                    continue
+                _link(graph, node, other, 1.0 if stones[neighbour] else 0.5)
+            for edge, bit in enumerate((1, 2)):
+                if mask[k] & bit:
+                    _link(graph, node, self._edge(colour, edge), 1.0)
+        return graph
+
+    def _assign(self, container, key, value):
+        if isinstance(container, dict):
+            old = container.get(key, _MISSING)
+        else:
+            old = container[key]
+        self._trail.append((container, key, old))
+        if value is _MISSING:
+            del container[key]
+        else:
+            container[key] = value
+
+    def play(self, index, colour):
+        """Ход цвета colour в клетку index на поле и в графах"""
+        board = self.board
+        layout = self.layout
+        stones = board.stones
+        self._marks.append(len(self._trail))
+
+        side = self.sides[colour]
+        merged = {index}
+        merged.update(board.find(neighbour)
+                      for neighbour in layout.neighbours[index]
+                      if stones[neighbour] == colour)
+        mask = layout.sides[side][index]
+        merged.update(self._edge(colour, edge)
+                      for edge, bit in enumerate((1, 2)) if mask & bit)
+        other_graph = self.graphs[3 - colour]
+        blocked = self._reach(other_graph, index,
+                              (self._edge(3 - colour, 0),
+                               self._edge(3 - colour, 1)))
+        board.play(index, side, colour)
+        root = board.find(index)
+
+        for neighbour in other_graph[index]:
+            self._assign(other_graph[neighbour], index, _MISSING)
+        self._assign(other_graph, index, _MISSING)
+
+        graph = self.graphs[colour]
+        joined = {}
+        for node in merged:
+            for neighbour, conductance in graph[node].items():
+                if neighbour not in merged:
+                    if node == index:
+                        conductance = 1.0
+                    joined[neighbour] = joined.get(neighbour, 0) + conductance
+        for node in merged:
+            self._assign(graph, node, _MISSING)
+        self._assign(graph, root, joined)
+        for neighbour, conductance in joined.items():
+            neighbours = graph[neighbour]
+            for node in merged:
+                if node in neighbours:
+                    self._assign(neighbours, node, _MISSING)
+            self._assign(neighbours, root, conductance)
+
+        count = layout.count
+        seeds = [k for k in joined if k < count and not stones[k]]
+        for own, changed in ((colour, seeds), (3 - colour, blocked)):
+            reaches = {}
+            for edge in (0, 1):
+                values = self.distances[own][edge]
+                if values[index] < INF:
+                    self._assign(values, index, INF)
+                self._update_distances(own, edge, changed, reaches)
+        return board.winner
+
+    def undo(self):
+        self.board.undo()
+        mark = self._marks.pop()
+        trail = self._trail
+        while len(trail) > mark:
+            container, key, old = trail.pop()
+            if old is _MISSING:
+                del container[key]
+            else:
+                container[key] = old
+
+    def sync(self, game):
+        """Переводит оценщик в позицию game: лишние камни снимаются через
+        undo, если это последние ходы, недостающие ставятся через play.
+        Иначе графы строятся заново"""
+        stones = self.board.stones
+        target = game.board.stones
+        removed = {k for k in range(len(stones))
+                   if stones[k] and stones[k] != target[k]}
+        moves = self.board.moves
+        while removed and moves and moves[-1][0] in removed:
+            removed.discard(moves[-1][0])
+            self.undo()
+        if removed:
+            self.__init__(game.copy().board, self.sides, self.tolerance,
+                          self.relaxation)
+            return
+        for k in range(len(stones)):
+            if target[k] and not stones[k]:
+                self.play(k, target[k])
+
+    def _reach(self, graph, node, opaque):
+        """Соседи пустой клетки node с учётом соединений через группы"""
+        count = self.layout.count
+        stones = self.board.stones
+        result = set()
+        for neighbour in graph[node]:
+            if neighbour < count and not stones[neighbour]:
+                result.add(neighbour)
+            elif neighbour not in opaque:
+                result.update(graph[neighbour])
+        result.discard(node)
+        return result
+
+    def _update_distances(self, colour, edge, seeds, reaches):
+        """Пересчёт двойных расстояний от стороны edge после изменения
+        соседства пустых клеток seeds. Сначала по возрастанию значений
+        собираются клетки, потерявшие опору - двух соседей с меньшими
+        значениями, - и их соседи с большими значениями. Затем они и seeds
+        пересчитываются по значениям соседей, уменьшения расходятся
+        дальше как в алгоритме Дейкстры. reaches - общий для обеих сторон
+        словарь соседей клеток в графе цвета colour"""
+        values = self.distances[colour][edge]
+        stones = self.board.stones
+        graph = self.graphs[colour]
+        source = self._edge(colour, edge)
+        opaque = (self._edge(colour, 0), self._edge(colour, 1))
+
+        def get_reach(k):
+            reach = reaches.get(k)
+            if reach is None:
+                reach = reaches[k] = self._reach(graph, k, opaque)
+            return reach
+
+        def get_distance(k):
+            """Второе по величине значение соседей плюс один, 1 у стороны"""
+            if source in graph[k]:
+                return 1
+            first = second = INF
+            for neighbour in get_reach(k):
+                value = values[neighbour]
+                if value < first:
+                    first, second = value, first
+                elif value < second:
+                    second = value
+            return second + 1 if second < INF else INF
+
+        heap = [(values[k], k) for k in seeds if values[k] < INF]
+        heapify(heap)
+        lost = set()
+        while heap:
+            value, k = heappop(heap)
+            if k in lost or values[k] != value or source in graph[k]:
+                continue
+            reach = get_reach(k)
+            if sum(values[neighbour] < value for neighbour in reach) >= 2:
+                continue
+            lost.add(k)
+            self._assign(values, k, INF)
+            for neighbour in reach:
+                if value < values[neighbour] < INF:
+                    heappush(heap, (values[neighbour], neighbour))
+
+        heap = []
+        for k in lost.union(seeds):
+            if not stones[k]:
+                value = get_distance(k)
+                if value < values[k]:
+                    heappush(heap, (value, k))
+        while heap:
+            value, k = heappop(heap)
+            if value >= values[k]:
+                continue
+            self._assign(values, k, value)
+            for neighbour in get_reach(k):
+                if values[neighbour] > value + 1:
+                    candidate = get_distance(neighbour)
+                    if candidate < values[neighbour]:
+                        heappush(heap, (candidate, neighbour))
+
+    def two_distance(self, colour):
+        """Потенциал цвета colour: наименьшая сумма двойных расстояний
+        клетки до обеих его сторон, 0 если стороны уже соединены, 2 * INF
+        если соединить их нельзя"""
+        if self.board.winner == colour:
+            return 0
+        potential = min(map(add, *self.distances[colour]), default=INF)
+        return potential if potential < INF else 2 * INF
+
+    def resistance(self, colour):
+        """Сопротивление между сторонами цвета colour: пустая клетка - 1,
+        свои камни - 0, чужие не проводят ток. Напряжения уточняются
+        методом верхней релаксации, начиная с решения для прошлой позиции"""
+        source = self._edge(colour, 0)
+        sink = self._edge(colour, 1)
+        if source == sink:
+            return 0.0
+        graph = self.graphs[colour]
+        reached = {source}
+        stack = [source]
+        while stack:
+            for neighbour in graph[stack.pop()]:
+                if neighbour not in reached:
+                    reached.add(neighbour)
+                    stack.append(neighbour)
+        if sink not in reached:
+            return inf
+        voltages = self.voltages[colour]
+        voltages[source] = 1.0
+        voltages[sink] = 0.0
+        nodes = []
+        for node in reached:
+            if node != source and node != sink:
+                neighbours = graph[node]
+                total = sum(neighbours.values())
+                nodes.append((node, tuple(neighbours), tuple(
+                    conductance / total
+                    for conductance in neighbours.values())))
+        get = voltages.__getitem__
+        for _ in range(10 * len(nodes) + 10):
+            delta = 0.0
+            for node, neighbours, weights in nodes:
+                value = sum(map(mul, weights, map(get, neighbours)))
+                change = value - voltages[node]
+                delta = max(delta, abs(change))
+                voltages[node] += self.relaxation * change
+            if delta < self.tolerance:
+                break
+        current = sum(conductance * (1.0 - voltages[neighbour])
+                      for neighbour, conductance in graph[source].items())
+        return 1.0 / current if current > 0 else inf
+
+    def evaluate(self, colour):
+        """Оценка позиции для цвета colour: разность потенциалов соперника
+        и своего, inf и -inf для законченной партии"""
+        winner = self.board.winner
+        if winner:
+            return inf if winner == colour else -inf
+        return self.two_distance(3 - colour) - self.two_distance(colour)
+
+    def evaluate_resistance(self, colour):
+        """Логарифм отношения сопротивлений соперника и своего"""
+        winner = self.board.winner
+        if winner:
+            return inf if winner == colour else -inf
+        own = self.resistance(colour)
+        other = self.resistance(3 - colour)
+        if own == other:
+            return 0.0
+        if other == inf or own == 0:
+            return inf
+        if own == inf or other == 0:
+            return -inf
+        return log(other / own)
+
+
+def _link(graph, node, other, conductance):
+    for first, second in ((node, other), (other, node)):
+        neighbours = graph.setdefault(first, {})
+        neighbours[second] = neighbours.get(second, 0) + conductance
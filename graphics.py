@@ -1,15 +1,75 @@
 """Классы для рисования"""
 
 import argparse
-from classes import Game, get_valid_rounded_coordinates
-from players import Human, AI, create_player
-from utilites import *
+from functools import lru_cache
+from math import ceil, floor
+from time import perf_counter
+import book
+from classes import Game, get_layout
+from history import History
+import network
+from players import Human, PLAYER_TYPES, create_player
+import records
+import stats
+from thinking import Thinker
+from utilites import (distance, get_cell_at, get_cell_center,
+                      get_rhombuses, sin60)
+
+
+def get_parser():
+    """Разбор аргументов запуска, без Qt: --help и ошибки в аргументах
+    не ждут импорта PyQt5"""
+    parser = argparse.ArgumentParser(
+        usage='%(prog)s [OPTIONS]',
+        description='Nex Game')
+    parser.add_argument('--field-size', '-n', type=int, default=11,
+                        help='Field size')
+    parser.add_argument(f'--first', '-f', type=str, help='name', default="One")
+    parser.add_argument(f'--second', '-s', type=str, help='name',
+                        default="Two")
+    parser.add_argument(f'--first-role', type=str, help='role mode',
+                        default='Human',
+                        choices=[*PLAYER_TYPES])
+    parser.add_argument(f'--second-role', type=str, help='role mode',
+                        default='AI',
+                        choices=[*PLAYER_TYPES])
+    parser.add_argument('--cell-size', '-r', type=int, default=25,
+                        help='Cell side size (from 2 to 70)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Processes for MCTS search (0 for all cores)')
+    parser.add_argument('--book', type=str, default=book.DEFAULT_PATH,
+                        help='Opening book file for MCTS and AlphaBeta')
+    parser.add_argument('--stats', action='store_true',
+                        help='Measure moves, thinking and painting, '
+                             'show the statistics overlay (F3)')
+    parser.add_argument('--stats-file', type=str, default=None,
+                        help='JSON file for statistics on exit')
+    parser.add_argument('--profile', type=str, default=None,
+                        help='cProfile (pstats) file for the session')
+    return parser
+
+
+if __name__ == '__main__':
+    ARGS = get_parser().parse_args()
+
 from PyQt5 import QtGui, QtWidgets
 from PyQt5.QtWidgets import (QFrame, QAction, QMessageBox, QDialog,
                              QDialogButtonBox, QLabel, QVBoxLayout,
-                             QHBoxLayout, QLineEdit, QSpinBox, QComboBox)
-from PyQt5.QtCore import Qt, QPoint, QTimerEvent
-from PyQt5.QtGui import QPen, QBrush
+                             QHBoxLayout, QLineEdit, QSpinBox, QComboBox,
+                             QFileDialog, QSlider)
+from PyQt5.QtCore import (Qt, QPoint, QPointF, QRect, QTimer, QTimerEvent,
+                          pyqtSignal)
+from PyQt5.QtGui import (QPen, QBrush, QImage, QPixmap, QPolygonF,
+                         QTransform)
+
+LOD_RADIUS = 4
+MAX_LAYER_PIXELS = 4096 * 4096
+MIN_CELL_SIZE = 2
+MAX_CELL_SIZE = 70
+ZOOM_STEP = 1.25
+ZOOM_SETTLE = 300
+HEX_OFFSETS = [(0, 1), (sin60, 1 / 2), (sin60, -1 / 2),
+               (0, -1), (-sin60, -1 / 2), (-sin60, 1 / 2)]
 
 
 def point_to_qt_point(point):
@@ -17,26 +77,174 @@ def point_to_qt_point(point):
 
 
 def get_hex_points(center, radius):
-    for x, y in [(0, 1), (sin60, 1 / 2), (sin60, -1 / 2),
-                 (0, -1), (-sin60, -1 / 2), (-sin60, 1 / 2)]:
+    for x, y in HEX_OFFSETS:
         yield QPoint(int(center[0] + x * radius), int(center[1] + y * radius))
 
 
+class HexGeometry:
+    """Центры, шестиугольники и описанные прямоугольники всех клеток поля
+    в порядке номеров клеток Layout. Клетки строки идут подряд слева
+    направо, поэтому клетки области находятся по координатам"""
+
+    def __init__(self, size, radius):
+        layout = get_layout(size)
+        self.radius = radius
+        self.centers = [get_cell_center(i, j, size, radius)
+                        for i, j in layout.coordinates]
+        self.polygons = [QPolygonF([QPointF(x + dx * radius, y + dy * radius)
+                                    for dx, dy in HEX_OFFSETS])
+                         for x, y in self.centers]
+        self.width = radius * sin60 + 2
+        self.height = radius + 2
+        self.rects = [QRect(int(x - self.width), int(y - self.height),
+                            int(2 * self.width) + 1,
+                            int(2 * self.height) + 1)
+                      for x, y in self.centers]
+        self.rows = []
+        for index, (i, j) in enumerate(layout.coordinates):
+            if j == 0:
+                self.rows.append([index, 0, self.centers[index][0]])
+            self.rows[-1][1] += 1
+        self.top = self.centers[0][1]
+
+    def get_cells(self, rect):
+        """Номера клеток, описанные прямоугольники которых могут
+        пересекать rect, без перебора всего поля"""
+        row_step = 1.5 * self.radius
+        step = 2 * self.radius * sin60
+        first = max(0, ceil((rect.top() - self.height - self.top) /
+                            row_step))
+        last = min(len(self.rows) - 1,
+                   floor((rect.bottom() + self.height + 1 - self.top) /
+                         row_step))
+        for start, length, x in self.rows[first:max(first, last + 1)]:
+            left = max(0, ceil((rect.left() - self.width - x) / step))
+            right = min(length - 1,
+                        floor((rect.right() + self.width + 1 - x) / step))
+            yield from range(start + left, start + right + 1)
+
+
+class LodImage:
+    """Поле одной картинкой с палитрой для мелких клеток: каждая клетка -
+    прямоугольник вокруг центра, прямоугольники соседних клеток
+    смыкаются. Картинка в точках виджета с масштабом scale. При ходе
+    перекрашиваются только изменившиеся клетки"""
+
+    COLOURS = [0x00000000, 0xffd8d8d8, 0xff0000ff, 0xffff0000]
+
+    def __init__(self, hexes, width, height, stones, scale=1.0):
+        self.image = QImage(max(width, 1), max(height, 1),
+                            QImage.Format_Indexed8)
+        self.image.setColorTable(self.COLOURS)
+        self.image.fill(0)
+        self.stride = self.image.bytesPerLine()
+        radius = hexes.radius * scale
+        half = radius * sin60
+        origin = min(first for _, _, first in hexes.rows) * scale
+        self.row_of = []
+        self.rows = []
+        for start, length, first in hexes.rows:
+            y = hexes.centers[start][1] * scale
+            top = max(0, round(y - 0.75 * radius))
+            band = range(top, min(height, max(top + 1,
+                                              round(y + 0.75 * radius))))
+            offset = round((first * scale - origin) / half)
+            self.rows.append((band, start, length, offset))
+            self.row_of += [len(self.rows) - 1] * length
+        # центры клеток всех строк лежат на решётке с шагом в полклетки
+        self.spans = []
+        for m in range(max(offset + 2 * length - 1
+                           for _, _, length, offset in self.rows)):
+            x = origin + m * half
+            left = max(0, round(x - half))
+            self.spans.append((left, min(width,
+                                         max(left + 1, round(x + half)))))
+        self.fill(stones)
+
+    def _get_view(self):
+        bits = self.image.bits()
+        bits.setsize(self.image.byteCount())
+        return memoryview(bits)
+
+    def fill(self, stones):
+        """Перекраска всех клеток: строка клеток собирается один раз и
+        копируется во все строки точек своей полосы"""
+        view = self._get_view()
+        stride = self.stride
+        for band, start, length, offset in self.rows:
+            line = bytearray(stride)
+            spans = self.spans[offset:offset + 2 * length:2]
+            for (left, right), stone in zip(spans,
+                                            stones[start:start + length]):
+                line[left:right] = bytes([stone + 1]) * (right - left)
+            for row in band:
+                view[row * stride:(row + 1) * stride] = line
+
+    def update(self, stones, cells):
+        view = self._get_view()
+        stride = self.stride
+        for index in cells:
+            band, start, _, offset = self.rows[self.row_of[index]]
+            left, right = self.spans[offset + 2 * (index - start)]
+            value = bytes([stones[index] + 1]) * (right - left)
+            for row in band:
+                view[row * stride + left:row * stride + right] = value
+
+
+@lru_cache(maxsize=16)
+def get_hex_geometry(size, radius):
+    return HexGeometry(size, radius)
+
+
+GAME_FILES = 'Nex games (*.nex);;SGF text (*.sgf);;All files (*)'
+
+
 class Gui(QFrame):
-    """Игровое поле"""
+    """Игровое поле. Клетки считаются для стороны radius, масштаб
+    (Ctrl + колесо мыши) - преобразование painter без пересчёта клеток.
+    Виджет и его таймер переиспользуются для новых партий"""
+
+    move_ready = pyqtSignal(object, object)
+    position_changed = pyqtSignal()
+    zoomed = pyqtSignal(object, object)
 
     def __init__(self, game: Game, players,
-                 cell_size: int, parent):
+                 cell_size: int, parent, history=None):
         super().__init__(parent)
-        self.game = game
+        self.side_to_pen = [QPen(color, 3, Qt.SolidLine) for color in
+                            [Qt.blue, Qt.red, Qt.blue, Qt.red]]
+        self.blackPen = QPen(Qt.black, 1, Qt.SolidLine)
+        self.interval = 50
+        self.period = 2000
+        self.timer_id = 0
         self.radius = cell_size
-        self.distance = self.radius * sin60
-        self.shoulder = self.game.size * self.radius * 2 * sin60
-        self.center = (self.radius * (sin60 * self.game.size + 1),
-                       self.radius / sin60 +
-                       self.shoulder * sin60)
-        self.setGeometry(0, 0, 2 * int(self.center[0]),
-                         2 * int(self.center[1]))
+        self.scale = 1.0
+        self.transform = QTransform()
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(ZOOM_SETTLE)
+        self.settle_timer.timeout.connect(self.update)
+        self.game = None
+        self.players = ()
+        self.board_layer = None
+        self.lod_image = None
+        self.show_stats = False
+        self.last_tick = None
+        self.move_ready.connect(self.on_move_ready)
+        self.thinker = Thinker(self.move_ready.emit)
+        self.new_game(game, players, history)
+
+    def new_game(self, game: Game, players, history=None):
+        """Партия game на этом же виджете. Клетки и картинка пустого поля
+        пересчитываются, только если изменился размер поля"""
+        self.thinker.cancel()
+        for player in self.players:
+            if player not in players:
+                player.close()
+        old = self.game
+        self.game = game
+        self.history = history or History(game)
+        self.players = players
         self.player_to_brush = {
             None: QBrush(),
             players[0].name: QBrush(Qt.blue),
@@ -45,31 +253,131 @@ class Gui(QFrame):
             players[0].name: '/',
             players[1].name: '\\'
         }
-        self.side_to_pen = [QPen(color, 3, Qt.SolidLine) for color in
-                            [Qt.blue, Qt.red, Qt.blue, Qt.red]]
-        self.blackPen = QPen(Qt.black, 1, Qt.SolidLine)
-        self.players = players
-        self.index = 0
-        self.interval = 50
-        self.period = 2000
-        self.timer_id = self.startTimer(self.interval)
+        self.index = game.colour - 1
         self.wait_ticks = 0
+        self.shown_scores = None
+        if old is None or old.size != game.size:
+            self.update_geometry(self.radius)
+        else:
+            if self.lod_image is not None:
+                self.lod_image.fill(game.board.stones)
+            self.update()
+        if not self.timer_id:
+            self.timer_id = self.startTimer(self.interval)
+        self.ponder()
 
     def update_geometry(self, radius):
+        """Пересчёт клеток для стороны radius, масштаб сохраняется"""
         self.radius = radius
         self.distance = self.radius * sin60
         self.shoulder = self.game.size * self.radius * 2 * sin60
         self.center = (self.radius * (sin60 * self.game.size + 1),
                        self.radius / sin60 +
                        self.shoulder * sin60)
-        self.setGeometry(0, 0, 2 * int(self.center[0]),
-                         2 * int(self.center[1]))
+        self.hexes = get_hex_geometry(self.game.size, self.radius)
+        self._resize()
 
-    def _draw_cell(self, i, j, painter):
+    def _resize(self):
+        self.transform = QTransform.fromScale(self.scale, self.scale)
+        self.setGeometry(0, 0, int(2 * int(self.center[0]) * self.scale),
+                         int(2 * int(self.center[1]) * self.scale))
+        self.board_layer = None
+        self.lod_image = None
+        self.update()
+
+    def get_cell_size(self):
+        """Видимая сторона клетки с учётом масштаба"""
+        return self.radius * self.scale
+
+    def set_scale(self, scale, anchor=None):
+        """Масштаб поля. Точка виджета anchor переезжает вместе с полем,
+        её старое и новое положение уходят сигналом zoomed"""
+        scale = min(max(scale, MIN_CELL_SIZE / self.radius),
+                    MAX_CELL_SIZE / self.radius)
+        if scale == self.scale:
+            return
+        ratio = scale / self.scale
+        self.scale = scale
+        self.settle_timer.start()
+        self._resize()
+        if anchor is not None:
+            self.zoomed.emit(anchor, anchor * ratio)
+
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        if not event.modifiers() & Qt.ControlModifier:
+            super().wheelEvent(event)
+            return
+        steps = event.angleDelta().y() / 120
+        self.set_scale(self.scale * ZOOM_STEP ** steps, event.pos())
+        event.accept()
+
+    def to_widget(self, rect):
+        """Прямоугольник поля в точках виджета"""
+        return self.transform.mapRect(rect).adjusted(-1, -1, 1, 1)
+
+    def to_field(self, rect):
+        """Прямоугольник виджета в координатах клеток"""
+        return self.transform.inverted()[0].mapRect(rect).adjusted(
+            -1, -1, 1, 1)
+
+    def is_lod(self):
+        """Клетки слишком мелкие, чтобы рисовать шестиугольники"""
+        return self.get_cell_size() < LOD_RADIUS
+
+    def _get_lod_image(self):
+        if self.lod_image is None or \
+                self.lod_image.image.size() != self.size():
+            self.lod_image = LodImage(self.hexes, self.width(),
+                                      self.height(), self.game.board.stones,
+                                      self.scale)
+        return self.lod_image.image
+
+    def _get_board_layer(self):
+        """Неизменная часть поля: ромб и пустые клетки. None для полей,
+        картинка которых заняла бы слишком много памяти, и пока масштаб
+        меняется: каждый шаг колеса иначе перерисовывал бы всё поле"""
+        if self.width() * self.height() > MAX_LAYER_PIXELS or \
+                self.settle_timer.isActive():
+            return None
+        if self.board_layer is None or self.board_layer.size() != self.size():
+            self.board_layer = QPixmap(self.size())
+            self.board_layer.fill(Qt.transparent)
+            painter = QtGui.QPainter(self.board_layer)
+            painter.setTransform(self.transform)
+            self._draw_rhombus(painter)
+            painter.setPen(self.blackPen)
+            painter.setBrush(self.player_to_brush[None])
+            for polygon in self.hexes.polygons:
+                painter.drawPolygon(polygon)
+            painter.end()
+        return self.board_layer
+
+    def get_score_rect(self):
+        return QRect(0, 0, self.width(), int(self.get_cell_size() * 2) + 1)
+
+    def _draw_cells(self, painter, rect):
+        """Ромб и пустые клетки в области rect без готовой картинки"""
+        self._draw_rhombus(painter)
+        painter.setPen(self.blackPen)
+        painter.setBrush(self.player_to_brush[None])
+        polygons = self.hexes.polygons
+        for index in self.hexes.get_cells(rect):
+            painter.drawPolygon(polygons[index])
+
+    def _draw_stones(self, painter, rect):
+        """Камни в области rect, по одной смене кисти на цвет"""
+        board = self.game.board
+        stones = board.stones
+        polygons = self.hexes.polygons
+        groups = {}
+        for index in self.hexes.get_cells(rect):
+            if stones[index]:
+                groups.setdefault(stones[index], []).append(polygons[index])
         painter.setPen(self.blackPen)
-        painter.setBrush(self.player_to_brush[self.game[i, j].player])
-        gui_point = self.get_gui_from_math(i, j)
-        painter.drawPolygon(*get_hex_points(gui_point, self.radius))
+        for stone, group in groups.items():
+            painter.setBrush(self.player_to_brush[board.players[stone - 1]])
+            for polygon in group:
+                painter.drawPolygon(polygon)
 
     def _draw_rhombus(self, painter):
         inner, outer = get_rhombuses(self.center, self.shoulder, self.radius)
@@ -82,7 +390,8 @@ class Gui(QFrame):
             painter.drawLine(outer[i], outer[(i + 1) % 4])
 
     def draw_score(self, painter: QtGui.QPainter):
-        painter.setFont(QtGui.QFont("Arial", int(self.distance / 2), False))
+        painter.setFont(QtGui.QFont("Arial", max(1, int(self.distance / 2)),
+                                    False))
         painter.setPen(self.blackPen)
         for i in range(2):
             player = self.players[i]
@@ -95,16 +404,59 @@ class Gui(QFrame):
             painter.drawText(x, y, message)
 
     def paintEvent(self, event: QtGui.QPaintEvent):
+        rect = event.rect()
+        area = self.to_field(rect)
         painter = QtGui.QPainter(self)
-        self._draw_rhombus(painter)
-        for i, j in self.game.cells.keys():
-            self._draw_cell(i, j, painter)
-        self.draw_score(painter)
+        if self.is_lod():
+            painter.drawImage(rect, self._get_lod_image(), rect)
+            painter.setTransform(self.transform)
+            self._draw_rhombus(painter)
+        else:
+            layer = self._get_board_layer()
+            if layer is not None:
+                painter.drawPixmap(rect, layer, rect)
+            painter.setTransform(self.transform)
+            if layer is None:
+                self._draw_cells(painter, area)
+            self._draw_stones(painter, area)
+        if rect.intersects(self.get_score_rect()):
+            self.draw_score(painter)
+        painter.resetTransform()
+        if self.show_stats and rect.intersects(self.get_stats_rect()):
+            self.draw_stats(painter)
+
+    def get_stats_rect(self):
+        top = self.get_score_rect().bottom() + 1
+        return QRect(0, top, 480, 16 * 20)
+
+    def draw_stats(self, painter: QtGui.QPainter):
+        """Счётчики и гистограммы stats поверх поля"""
+        rect = self.get_stats_rect()
+        painter.setFont(QtGui.QFont('Monospace', 8))
+        painter.setPen(self.blackPen)
+        lines = stats.STATS.lines()[:rect.height() // 16] or ['no stats']
+        painter.drawText(rect.adjusted(4, 0, 0, 0),
+                         Qt.AlignLeft | Qt.AlignTop, '\n'.join(lines))
+
+    def update_cells(self, old, new):
+        """Перерисовка только изменившихся клеток"""
+        changed = old.get_changed_cells(new)
+        if self.lod_image is not None:
+            self.lod_image.update(new.board.stones, changed)
+        for index in changed:
+            self.update(self.to_widget(self.hexes.rects[index]))
+
+    def update_scores(self):
+        scores = tuple(player.score for player in self.players)
+        if scores != self.shown_scores:
+            self.shown_scores = scores
+            self.update(self.get_score_rect())
 
     def mousePressEvent(self, event: QtGui.QMouseEvent):
         if self.game.winner:
             return
-        cell, length = self.get_closest_cell((event.x(), event.y()))
+        cell, length = self.get_closest_cell((event.x() / self.scale,
+                                              event.y() / self.scale))
         if length > self.radius:
             return
         current_player = self.players[self.index]
@@ -115,57 +467,97 @@ class Gui(QFrame):
         self.timer_method()
 
     def get_closest_cell(self, point):
-        x, y = self.get_math_from_gui(point[0], point[1])
-        result = (-1, -1)
-        min_length = 2 * self.radius
-        for i, j in get_valid_rounded_coordinates(x, y, self.game):
-            center = self.get_gui_from_math(i, j)
-            length = distance(point, center)
-            if length < min_length:
-                min_length = length
-                result = i, j
-        return result, min_length
+        cell = get_cell_at(point[0], point[1], self.game.size, self.radius)
+        if cell is None:
+            return (-1, -1), 2 * self.radius
+        return cell, distance(point, self.get_gui_from_math(*cell))
 
     def get_gui_from_math(self, i, j):
-        if i < self.game.size:
-            x = self.center[0] + (2 * j - i) * self.distance
-        else:
-            x = self.center[0] + (2 * j - 2 * self.game.size + i + 2) * \
-                self.distance
-        y = (3 * i + (1 + 1 / sin60) * 2) * self.radius / 2
-        return x, y
-
-    def get_math_from_gui(self, x, y):
-        i = 2 * (y - (1 + 1 / sin60) * self.radius) / (3 * self.radius)
-        if i < self.game.size:
-            j = ((x - self.center[0]) / self.distance + i) / 2
-        else:
-            j = ((x - self.center[0]) / self.distance + (2 * self.game.size - i
-                                                         - 1)) / 2
-        return i, j
+        return get_cell_center(i, j, self.game.size, self.radius)
 
     def timerEvent(self, event: QTimerEvent):
+        if stats.enabled:
+            now = perf_counter()
+            if self.last_tick is not None:
+                stats.STATS.record('timer.jitter', abs(
+                    now - self.last_tick - self.interval / 1000))
+                if self.show_stats and int(now) != int(self.last_tick):
+                    self.update(self.get_stats_rect())
+            self.last_tick = now
         self.timer_method()
 
     def timer_method(self):
         self.wait_ticks += 1
         current = self.players[self.index]
-        if (isinstance(current, Human) and
-                self.wait_ticks * self.interval >= self.period):
-            current.take_penalty(self.wait_ticks * self.interval //
-                                 self.period)
-            self.wait_ticks = (self.wait_ticks * self.interval %
-                               self.period)
-        modified = current.make_step(self.game, self.players_to_side)
+        if isinstance(current, Human):
+            if self.wait_ticks * self.interval >= self.period:
+                current.take_penalty(self.wait_ticks * self.interval //
+                                     self.period)
+                self.wait_ticks = (self.wait_ticks * self.interval %
+                                   self.period)
+            self.apply_step(current,
+                            current.make_step(self.game,
+                                              self.players_to_side))
+        elif (self.thinker.game is not self.game and not self.game.winner
+              and not self.history.can_redo()):
+            self.thinker.think(current, self.game, self.players_to_side)
+
+        self.update_scores()
+
+    def on_move_ready(self, game, step):
+        if game is not self.game or self.game.winner:
+            return
+        current = self.players[self.index]
+        self.apply_step(current,
+                        current.play(game, step, self.players_to_side))
+        self.update_scores()
+
+    def apply_step(self, current, modified):
         if modified:
+            self.update_cells(self.game, modified)
             self.game = modified
+            self.history.push(modified)
             self.index = 1 - self.index
             self.wait_ticks = 0
+            self.ponder()
+            self.position_changed.emit()
         if self.game.winner:
-            self.killTimer(self.timer_id)
+            self.stop()
             self.show_game_won_message(current.name, current.score)
 
-        self.repaint()
+    def goto(self, ply):
+        """Переход к позиции после ply ходов истории. Пока после неё
+        есть ходы для повтора, компьютерные игроки не ходят"""
+        if ply == self.history.ply:
+            return
+        self.thinker.cancel()
+        old = self.game
+        self.game = self.history.goto(ply)
+        self.update_cells(old, self.game)
+        self.index = self.game.colour - 1
+        self.wait_ticks = 0
+        if not self.timer_id and not self.game.winner:
+            self.timer_id = self.startTimer(self.interval)
+        self.ponder()
+        self.position_changed.emit()
+
+    def undo(self):
+        self.goto(self.history.ply - 1)
+
+    def redo(self):
+        self.goto(self.history.ply + 1)
+
+    def ponder(self):
+        """На ходу человека соперник обдумывает позицию в фоне"""
+        if isinstance(self.players[self.index], Human):
+            self.thinker.ponder(self.players[1 - self.index], self.game,
+                                self.players_to_side)
+
+    def stop(self):
+        self.thinker.cancel()
+        if self.timer_id:
+            self.killTimer(self.timer_id)
+            self.timer_id = 0
 
     def show_game_won_message(self, name, score):
         message = QMessageBox(self)
@@ -218,7 +610,7 @@ class GameDialog(QDialog):
         text = QLineEdit(player.name, self)
         combo_box = QComboBox()
 
-        combo_box.addItems(['AI', 'Human'])
+        combo_box.addItems([*PLAYER_TYPES])
         index = combo_box.findText(player.__class__.__name__)
         if index >= 0:
             combo_box.setCurrentIndex(index)
@@ -253,8 +645,8 @@ class ChangeCellSizeDialog(QDialog):
         self.h_layout = QHBoxLayout()
         self.label = QLabel('Choose cell size')
         self.spinBox = QSpinBox()
-        self.spinBox.setMinimum(5)
-        self.spinBox.setMaximum(70)
+        self.spinBox.setMinimum(MIN_CELL_SIZE)
+        self.spinBox.setMaximum(MAX_CELL_SIZE)
         self.spinBox.setValue(cell_size)
 
         self.h_layout.addWidget(self.label)
@@ -274,13 +666,54 @@ class ChangeCellSizeDialog(QDialog):
         return self.spinBox.value()
 
 
+class NetworkDialog(QDialog):
+    def __init__(self, name, size, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Network Game')
+        self.setFixedSize(300, 200)
+
+        self.layout = QVBoxLayout()
+        self.name = QLineEdit(name, self)
+        self.host = QLineEdit('127.0.0.1', self)
+        self.port = QSpinBox()
+        self.port.setRange(1, 65535)
+        self.port.setValue(network.PORT)
+        self.size_box = QSpinBox()
+        self.size_box.setRange(1, 150)
+        self.size_box.setValue(size)
+        for text, widget in (('Name', self.name), ('Server', self.host),
+                             ('Port', self.port),
+                             ('Field size', self.size_box)):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(text))
+            row.addWidget(widget)
+            self.layout.addLayout(row)
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Ok |
+                                          QDialogButtonBox.Cancel)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+
+        self.layout.addWidget(self.buttonBox)
+        self.setLayout(self.layout)
+
+
 class Window(QtWidgets.QMainWindow):
-    def __init__(self, game, players, cell_size, parent=None):
+    network_message = pyqtSignal(object)
+
+    def __init__(self, game, players, cell_size, player_options=None,
+                 parent=None):
         super().__init__(parent)
         self.setWindowTitle("Nex")
         self.cell_size = cell_size
+        self.player_options = player_options or {}
+        self.connection = None
+        self.network = None
+        self.network_token = None
+        self.network_message.connect(self.on_network_message)
 
         self._init_menu()
+        self._init_moves_bar()
         self._init_ui(game, players)
 
         self.was_maximized = self.isMaximized()
@@ -295,6 +728,31 @@ class Window(QtWidgets.QMainWindow):
         new_game_action.triggered.connect(self.update_field)
         game.addAction(new_game_action)
 
+        save_game_action = QAction('&Save Game', self)
+        save_game_action.setShortcut('Ctrl+S')
+        save_game_action.triggered.connect(self.save_game)
+        game.addAction(save_game_action)
+
+        load_game_action = QAction('&Load Game', self)
+        load_game_action.setShortcut('Ctrl+O')
+        load_game_action.triggered.connect(self.load_game)
+        game.addAction(load_game_action)
+
+        undo_action = QAction('&Undo', self)
+        undo_action.setShortcut('Ctrl+Z')
+        undo_action.triggered.connect(self.undo)
+        game.addAction(undo_action)
+
+        redo_action = QAction('&Redo', self)
+        redo_action.setShortcut('Ctrl+Y')
+        redo_action.triggered.connect(self.redo)
+        game.addAction(redo_action)
+
+        network_action = QAction('Ne&twork Game', self)
+        network_action.setShortcut('Ctrl+G')
+        network_action.triggered.connect(self.network_game)
+        game.addAction(network_action)
+
         close = QAction('&Close', self)
         close.setShortcut('Esc')
         close.triggered.connect(self.close_method)
@@ -305,6 +763,23 @@ class Window(QtWidgets.QMainWindow):
         change_cell_size.triggered.connect(self.update_field_geometry)
         parameters.addAction(change_cell_size)
 
+        self.stats_action = QAction('&Statistics', self)
+        self.stats_action.setShortcut('F3')
+        self.stats_action.setCheckable(True)
+        self.stats_action.toggled.connect(self.toggle_stats)
+        parameters.addAction(self.stats_action)
+
+        save_stats = QAction('Save S&tatistics', self)
+        save_stats.triggered.connect(self.save_stats)
+        parameters.addAction(save_stats)
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        self.close_network()
+        self.gui_game.stop()
+        for player in self.gui_game.players:
+            player.close()
+        super().closeEvent(event)
+
     def close_method(self):
         exit_confirm = QMessageBox(self)
         exit_confirm.setWindowTitle('Exit')
@@ -317,16 +792,50 @@ class Window(QtWidgets.QMainWindow):
         if exit_confirm.result() == QMessageBox.Ok:
             self.close()
 
+    def _init_moves_bar(self):
+        """Ползунок по ходам партии"""
+        bar = self.addToolBar('Moves')
+        self.moves_slider = QSlider(Qt.Horizontal, bar)
+        self.moves_slider.valueChanged.connect(self.goto)
+        self.moves_label = QLabel(bar)
+        bar.addWidget(self.moves_slider)
+        bar.addWidget(self.moves_label)
+
+    def update_moves_bar(self):
+        history = self.gui_game.history
+        self.moves_slider.blockSignals(True)
+        self.moves_slider.setMaximum(len(history))
+        self.moves_slider.setValue(history.ply)
+        self.moves_slider.blockSignals(False)
+        self.moves_label.setText(f'{history.ply}/{len(history)}')
+
     def _init_ui(self, game, players):
         self.scroller = QtWidgets.QScrollArea(self)
         self.scroller.setFrameStyle(QFrame.NoFrame)
         self.gui_game = Gui(game, players, self.cell_size, self.scroller)
         self.gui_game.setFrameStyle(QFrame.Box)
+        self.gui_game.position_changed.connect(self.update_moves_bar)
+        self.gui_game.position_changed.connect(self.send_network_move)
+        self.gui_game.zoomed.connect(self.scroll_to_anchor)
+        self.gui_game.show_stats = self.stats_action.isChecked()
+        self.update_moves_bar()
 
         self.scroller.setWidget(self.gui_game)
 
         self.setCentralWidget(self.scroller)
 
+    def new_game(self, game, players, history=None):
+        """Партия на том же поле: виджет и таймер не пересоздаются"""
+        self.gui_game.new_game(game, players, history)
+        self.update_moves_bar()
+
+    def scroll_to_anchor(self, old, new):
+        """Точка под курсором остаётся на месте при масштабировании"""
+        shift = new - old
+        for bar, delta in ((self.scroller.horizontalScrollBar(), shift.x()),
+                           (self.scroller.verticalScrollBar(), shift.y())):
+            bar.setValue(bar.value() + delta)
+
     def update_field(self):
         dialog = GameDialog(self.gui_game.game.size,
                             self.gui_game.players, self)
@@ -340,52 +849,195 @@ class Window(QtWidgets.QMainWindow):
             name2, type2 = dialog.get_player_data(1)
 
             game = Game(size, name1, name2)
-            player1 = create_player(name1, type1, game)
-            player2 = create_player(name2, type2, game)
-            self._init_ui(game, (player1, player2))
+            player1 = create_player(name1, type1, game,
+                                    **self.player_options)
+            player2 = create_player(name2, type2, game,
+                                    **self.player_options)
+            self.close_network()
+            self.new_game(game, (player1, player2))
+
+    def save_game(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Save game', '',
+                                              GAME_FILES)
+        if path:
+            records.save(path, [self.gui_game.history.to_record()])
+
+    def load_game(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Load game', '',
+                                              GAME_FILES)
+        if not path:
+            return
+        try:
+            record = next(records.load(path))
+            history = History.from_record(record)
+        except (OSError, ValueError, KeyError, StopIteration):
+            message = QMessageBox(self)
+            message.setWindowTitle('Load game')
+            message.setIcon(QMessageBox.Warning)
+            message.setText(f'{path} has no Nex game')
+            message.exec_()
+            return
+        game = history.game
+        players = [create_player(name, player.__class__.__name__, game,
+                                 **self.player_options)
+                   for name, player in zip(record.names,
+                                           self.gui_game.players)]
+        self.close_network()
+        self.new_game(game, players, history)
+
+    def goto(self, ply):
+        if self.network is None:
+            self.gui_game.goto(ply)
+        else:
+            self.update_moves_bar()
+
+    def undo(self):
+        self.goto(self.gui_game.history.ply - 1)
+
+    def redo(self):
+        self.goto(self.gui_game.history.ply + 1)
+
+    def network_game(self):
+        """Партия с соперником, подобранным сервером network.Server"""
+        dialog = NetworkDialog(self.gui_game.players[0].name,
+                               self.gui_game.game.size, self)
+        dialog.exec_()
+        if not dialog.result():
+            return
+        self.close_network()
+        token = object()
+        try:
+            self.connection = network.Connection(
+                dialog.host.text(), dialog.port.value(), dialog.name.text(),
+                lambda words: self.network_message.emit((token, words)))
+            self.connection.send('MATCH', dialog.size_box.value())
+        except OSError as error:
+            self.connection = None
+            self.show_network_message(f'No connection: {error}')
+            return
+        self.network_token = token
+        self.setWindowTitle('Nex - waiting for opponent')
+
+    def on_network_message(self, message):
+        token, words = message
+        if self.connection is None or token is not self.network_token:
+            return
+        command, *args = words
+        if command == 'START':
+            number, size, colour = map(int, args[:3])
+            game = Game(size, *args[3:5])
+            players = network.get_network_players(
+                game, self.connection.name, colour)
+            self.network = [number, colour, 0,
+                            players[2 - colour]]
+            self.new_game(game, players)
+            self.setWindowTitle(f'Nex - network game {number}')
+        elif self.network is not None and command == 'MOVE' and \
+                int(args[0]) == self.network[0]:
+            colour = 1 + self.network[2] % 2
+            self.network[2] += 1
+            if colour != self.network[1]:
+                self.network[3].put(int(args[1]))
+        elif self.network is not None and command == 'END' and \
+                int(args[0]) == self.network[0]:
+            number, colour, moves, _ = self.network
+            self.network = None
+            winner = int(args[1])
+            if self.gui_game.history.ply == moves and \
+                    not self.gui_game.game.winner:
+                self.gui_game.stop()
+                result = ('draw' if not winner else 'you won'
+                          if winner == colour else 'opponent won')
+                self.show_network_message(f'Game {number} over: {result}')
+        elif command in ('ERROR', 'CLOSED'):
+            self.show_network_message(' '.join(words))
+
+    def send_network_move(self):
+        """Отправляет серверу ход человека этого окна"""
+        history = self.gui_game.history
+        if self.network is None or not history.ply or history.can_redo():
+            return
+        if 1 + (history.ply - 1) % 2 == self.network[1]:
+            self.connection.send('MOVE', self.network[0],
+                                 history.moves[-1][0])
+
+    def close_network(self):
+        connection, self.connection = self.connection, None
+        self.network = None
+        if connection is not None:
+            connection.close()
+        self.setWindowTitle('Nex')
+
+    def show_network_message(self, text):
+        message = QMessageBox(self)
+        message.setWindowTitle('Network Game')
+        message.setIcon(QMessageBox.Information)
+        message.setText(text)
+        message.exec_()
+
+    def toggle_stats(self, checked):
+        if checked:
+            enable_stats()
+        self.gui_game.show_stats = checked
+        self.gui_game.update(self.gui_game.get_stats_rect())
+
+    def save_stats(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Save statistics', '',
+                                              'JSON (*.json)')
+        if path:
+            stats.STATS.dump(path)
 
     def update_field_geometry(self):
-        dialog = ChangeCellSizeDialog(self.cell_size, self)
+        dialog = ChangeCellSizeDialog(round(self.gui_game.get_cell_size()),
+                                      self)
         dialog.exec_()
         result = dialog.result()
 
         if result:
             self.cell_size = dialog.get_cell_size()
-            self.gui_game.update_geometry(self.cell_size)
+            self.gui_game.set_scale(self.cell_size / self.gui_game.radius)
+
 
+def enable_stats():
+    """Замеры stats вместе с временем отрисовки поля"""
+    if not stats.enabled:
+        stats.enable()
+        stats.instrument(Gui, 'paintEvent', 'paint')
 
-def run(game, players, cell_size):
+
+def run(game, players, cell_size, player_options=None, show_stats=False):
     app = QtWidgets.QApplication([])
-    wnd = Window(game, players, cell_size)
+    wnd = Window(game, players, cell_size, player_options)
+    wnd.stats_action.setChecked(show_stats)
     wnd.show()
     return app.exec_()
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        usage='%(prog)s [OPTIONS]',
-        description='Nex Game')
-    parser.add_argument('--field-size', '-n', type=int, default=11,
-                        help='Field size')
-    parser.add_argument(f'--first', '-f', type=str, help='name', default="One")
-    parser.add_argument(f'--second', '-s', type=str, help='name',
-                        default="Two")
-    parser.add_argument(f'--first-role', type=str, help='role mode',
-                        default=Human,
-                        choices=['Human', 'AI'])
-    parser.add_argument(f'--second-role', type=str, help='role mode',
-                        default=AI,
-                        choices=['Human', 'AI'])
-    parser.add_argument('--cell-size', '-r', type=int, default=25,
-                        help='Cell side size (from 5 to 50)')
-    args = parser.parse_args()
+def main(args=None):
+    if args is None:
+        args = get_parser().parse_args()
     game = Game(args.field_size, args.first, args.second)
-
-    player1 = create_player(args.first, args.first_role, game)
-    player2 = create_player(args.second, args.second_role, game)
-
-    run(game, (player1, player2), args.cell_size)
+    if args.stats or args.stats_file:
+        enable_stats()
+
+    options = {'workers': args.workers or None, 'book': args.book}
+    player1 = create_player(args.first, args.first_role, game, **options)
+    player2 = create_player(args.second, args.second_role, game, **options)
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(game, (player1, player2), args.cell_size, options, args.stats)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.stats_file:
+            stats.STATS.dump(args.stats_file)
 
 
 if __name__ == '__main__':
-    main()
+    main(ARGS)
@@ -0,0 +1,101 @@
+"""История ходов партии с отменой, повтором и переходом к любому ходу"""
+
+from classes import Game
+from records import SIDES, GameRecord
+
+
+class History:
+    """Ходы партии от позиции root: номера клеток и стороны. Текущая
+    позиция game - после ply ходов, ходы дальше неё можно повторить.
+    Отмена и повтор стоят один ход на общем поле Game. Каждые interval
+    ходов запоминается позиция с собственным полем, от которой строится
+    позиция при дальнем переходе, поэтому переход стоит не больше
+    interval ходов"""
+
+    def __init__(self, game, interval=256):
+        self.root = game
+        self.interval = interval
+        self.moves = []
+        self.ply = 0
+        self.game = game
+        self.prefix = [index for index, *_ in game.board.moves]
+        self._snapshots = {0: game}
+
+    @classmethod
+    def from_record(cls, record, interval=256):
+        """История всех ходов записи с текущей позицией в конце.
+        ValueError для хода вне поля или в занятую клетку"""
+        history = cls(Game(record.size, *record.names), interval)
+        game = history.game
+        coordinates = game.layout.coordinates
+        for ply, index in enumerate(record.moves):
+            if not 0 <= index < len(coordinates):
+                raise ValueError(f'move {index} is off the board')
+            if game.board.stones[index]:
+                raise ValueError(f'move {index} is repeated')
+            game = game.make_step(*coordinates[index], SIDES[1 + ply % 2])
+            history.push(game)
+        return history
+
+    def __len__(self):
+        return len(self.moves)
+
+    def push(self, game):
+        """Запоминает позицию game после хода из текущей позиции.
+        Отменённые ходы дальше текущей позиции забываются"""
+        if game is self.game:
+            return
+        if game._parent is not self.game:
+            raise ValueError('game is not a move from the current position')
+        index, side, _ = game._move
+        del self.moves[self.ply:]
+        for ply in [ply for ply in self._snapshots if ply > self.ply]:
+            del self._snapshots[ply]
+        self.moves.append((index, side))
+        self.ply += 1
+        self.game = game
+        if not self.ply % self.interval:
+            self._snapshots[self.ply] = game.copy()
+
+    def can_undo(self):
+        return self.ply > 0
+
+    def can_redo(self):
+        return self.ply < len(self.moves)
+
+    def undo(self):
+        return self.goto(self.ply - 1)
+
+    def redo(self):
+        return self.goto(self.ply + 1)
+
+    def goto(self, ply):
+        """Позиция после ply ходов от root"""
+        ply = max(0, min(ply, len(self.moves)))
+        game = self.game
+        if ply < self.ply <= ply + min(self.interval, game._depth):
+            for _ in range(self.ply - ply):
+                game = game._parent
+        else:
+            start = max(k for k in self._snapshots if k <= ply)
+            if not start <= self.ply <= ply:
+                game = self._snapshots[start]
+            else:
+                start = self.ply
+            layout = game.layout
+            for index, side in self.moves[start:ply]:
+                game = game.make_step(*layout.coordinates[index], side)
+        self.ply = ply
+        self.game = game
+        return game
+
+    def to_record(self):
+        """Запись партии до текущей позиции вместе с ходами до root"""
+        root = self.root
+        names = root.player1, root.player2
+        if root.colour == 2:
+            names = names[::-1]
+        winner = self.game.winner
+        winner = names.index(winner) + 1 if winner else 0
+        moves = self.prefix + [index for index, _ in self.moves[:self.ply]]
+        return GameRecord(root.size, moves, names, winner)
@@ -0,0 +1,271 @@
+"""Поиск по дереву Монте-Карло"""
+
+import os
+from math import log, sqrt
+from random import Random
+from time import perf_counter
+from classes import Board
+
+
+def get_free_cells(stones):
+    return [k for k, stone in enumerate(stones) if not stone]
+
+
+def connects(layout, stones, colour, side):
+    """Соединены ли камни цвета colour стороны side поля"""
+    start, finish = layout.edges[side]
+    neighbours = layout.neighbours
+    stack = [k for k in start if stones[k] == colour]
+    seen = set(stack)
+    finish = set(finish)
+    while stack:
+        k = stack.pop()
+        if k in finish:
+            return True
+        for neighbour in neighbours[k]:
+            if stones[neighbour] == colour and neighbour not in seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    return False
+
+
+def playout(layout, stones, colour, sides, rng):
+    """Случайная партия: свободные клетки заполняются за один проход,
+    начиная с цвета colour, победитель проверяется один раз в конце.
+    Соседство клеток нижней половины ромба (Layout.dx_dy) допускает
+    заполненное поле без победителя, тогда возвращается 0"""
+    stones = stones[:]
+    free = get_free_cells(stones)
+    rng.shuffle(free)
+    half = (len(free) + 1) // 2
+    for k in free[:half]:
+        stones[k] = colour
+    for k in free[half:]:
+        stones[k] = 3 - colour
+    if connects(layout, stones, 1, sides[1]):
+        return 1
+    if connects(layout, stones, 2, sides[2]):
+        return 2
+    return 0
+
+
+class Node:
+    """Узел дерева. Непробованные ходы не хранятся: это клетки общего
+    списка Tree.cells по кругу со сдвига start, из них пробовано tried"""
+
+    __slots__ = ('move', 'colour', 'parent', 'children', 'start', 'tried',
+                 'visits', 'wins')
+
+    def __init__(self, move, colour, parent, start):
+        self.move = move
+        self.colour = colour
+        self.parent = parent
+        self.children = []
+        self.start = start
+        self.tried = 0
+        self.visits = 0
+        self.wins = 0
+
+    def select(self, exploration):
+        scale = exploration * sqrt(log(self.visits))
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits + scale / sqrt(child.visits)))
+
+
+class Tree:
+    """Дерево поиска для хода цвета colour на поле board. Ходы дерева
+    делаются через Board.play и отменяются после каждой итерации, поэтому
+    после поиска поле остаётся в исходной позиции. Свободные клетки
+    перемешиваются один раз на дерево, узлы берут из них ходы по своему
+    счётчику, поэтому память узла не зависит от размера поля"""
+
+    def __init__(self, board, colour, sides, rng=None, exploration=0.7):
+        self.board = board
+        self.sides = sides
+        self.rng = rng or Random()
+        self.exploration = exploration
+        self.cells = get_free_cells(board.stones)
+        self.rng.shuffle(self.cells)
+        self.root = self._new_node(None, 3 - colour, None)
+
+    def _new_node(self, move, colour, parent):
+        start = self.rng.randrange(len(self.cells)) if self.cells else 0
+        return Node(move, colour, parent, start)
+
+    def _get_untried(self, node):
+        """Следующий непробованный ход узла node, когда поле в его
+        позиции, или None. Занятые клетки пропускаются один раз"""
+        cells = self.cells
+        stones = self.board.stones
+        count = len(cells)
+        while node.tried < count:
+            move = cells[(node.start + node.tried) % count]
+            if not stones[move]:
+                return move
+            node.tried += 1
+        return None
+
+    def iterate(self):
+        board = self.board
+        node = self.root
+        depth = 0
+        while True:
+            move = None if board.winner else self._get_untried(node)
+            if move is not None or not node.children or board.winner:
+                break
+            node = node.select(self.exploration)
+            board.play(node.move, self.sides[node.colour], node.colour)
+            depth += 1
+        if move is not None:
+            node.tried += 1
+            colour = 3 - node.colour
+            board.play(move, self.sides[colour], colour)
+            depth += 1
+            child = self._new_node(move, colour, node)
+            node.children.append(child)
+            node = child
+
+        winner = board.winner or playout(board.layout, board.stones,
+                                         3 - node.colour, self.sides,
+                                         self.rng)
+        for _ in range(depth):
+            board.undo()
+
+        while node is not None:
+            node.visits += 1
+            if node.colour == winner:
+                node.wins += 1
+            elif not winner:
+                node.wins += 0.5
+            node = node.parent
+
+    def run(self, time_limit=None, playouts=None, cancel=None):
+        """Итерации до исчерпания времени, числа партий или до выставления
+        события cancel"""
+        deadline = None if time_limit is None else perf_counter() + time_limit
+        count = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                break
+            self.iterate()
+            count += 1
+            if playouts is not None and count >= playouts:
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                break
+            if playouts is None and deadline is None and cancel is None:
+                break
+        return count
+
+    def advance(self, move):
+        """Делает ход move из корня, поддерево хода становится корнем"""
+        root = self.root
+        colour = 3 - root.colour
+        self.board.play(move, self.sides[colour], colour)
+        for child in root.children:
+            if child.move == move:
+                break
+        else:
+            child = self._new_node(move, colour, None)
+        child.parent = None
+        self.root = child
+
+    def follow(self, stones):
+        """Переходит к позиции stones, если она совпадает с корнем или
+        отличается от него одним ходом. Иначе возвращает False"""
+        current = self.board.stones
+        if len(stones) != len(current):
+            return False
+        moves = [k for k in range(len(stones)) if stones[k] != current[k]]
+        if not moves:
+            return True
+        move = moves[0]
+        if (len(moves) > 1 or current[move] or
+                stones[move] != 3 - self.root.colour):
+            return False
+        self.advance(move)
+        return True
+
+    def best_move(self):
+        if not self.root.children:
+            return self._get_untried(self.root)
+        return max(self.root.children, key=lambda child: child.visits).move
+
+
+def search(board, colour, sides, time_limit=None, playouts=None, rng=None):
+    """Лучший ход цвета colour. sides: цвет -> сторона ('/' или '\\')"""
+    tree = Tree(board, colour, sides, rng)
+    tree.run(time_limit, playouts)
+    return tree.best_move()
+
+
+_cancel = None
+
+
+def _init_worker(cancel):
+    global _cancel
+    _cancel = cancel
+
+
+def _search_root(size, stones, colour, sides, time_limit, playouts, seed):
+    board = Board.from_stones(size, stones, sides)
+    tree = Tree(board, colour, sides, Random(seed))
+    limited = time_limit is not None or playouts is not None
+    tree.run(time_limit, playouts, _cancel if limited else None)
+    return [(child.move, child.visits, child.wins)
+            for child in tree.root.children]
+
+
+class ParallelSearch:
+    """Параллельный поиск по корню: каждый процесс пула строит своё дерево
+    из одной позиции, статистика ходов корня суммируется. В процессы
+    передаются только размер поля и массив цветов камней. Отмена поиска
+    передаётся процессам общим событием multiprocessing"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._cancel = None
+
+    def search(self, board, colour, sides, time_limit=None, playouts=None,
+               rng=None, cancel=None):
+        """Лучший ход или None, если поиск прерван событием cancel"""
+        from concurrent.futures import ProcessPoolExecutor, wait
+        from multiprocessing import Event
+
+        rng = rng or Random()
+        if self._executor is None:
+            self._cancel = Event()
+            self._executor = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker,
+                initargs=(self._cancel,))
+        self._cancel.clear()
+        stones = bytes(board.stones)
+        share = None if playouts is None else -(-playouts // self.workers)
+        futures = [self._executor.submit(_search_root, board.size, stones,
+                                         colour, sides, time_limit, share,
+                                         rng.getrandbits(32))
+                   for _ in range(self.workers)]
+        pending = futures
+        while pending:
+            if cancel is not None and cancel.is_set():
+                self._cancel.set()
+                wait(pending)
+                return None
+            _, pending = wait(pending,
+                              timeout=None if cancel is None else 0.01)
+        stats = {}
+        for future in futures:
+            for move, visits, wins in future.result():
+                total = stats.setdefault(move, [0, 0])
+                total[0] += visits
+                total[1] += wins
+        if not stats:
+            free = get_free_cells(stones)
+            return rng.choice(free) if free else None
+        return max(stats, key=lambda move: stats[move][0])
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
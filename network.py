@@ -0,0 +1,480 @@
+"""Игра по сети: сервер на asyncio, строковый протокол поверх TCP,
+клиент без графики для компьютерных игроков и клиент для окна игры"""
+
+import argparse
+import asyncio
+import json
+import queue
+import socket
+import sys
+import threading
+from collections import deque
+from itertools import count
+from classes import Board, Game
+from players import PLAYER_TYPES, Human, Player, create_player
+from records import SIDES
+
+PORT = 7777
+INLINE_ROLES = {'AI'}
+
+
+def encode(*words):
+    return ' '.join(map(str, words)).encode() + b'\n'
+
+
+def decode(line):
+    return line.decode(errors='replace').split()
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Peer:
+    """Соединение с клиентом на сервере"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.name = None
+        self.sessions = set()
+
+    def send(self, *words):
+        self.writer.write(encode(*words))
+
+
+class Session:
+    """Партия на сервере: поле и соединения игроков по цветам"""
+
+    def __init__(self, number, size, owner):
+        self.number = number
+        self.board = Board(size)
+        self.players = [owner, None]
+
+    def send(self, *words):
+        for peer in self.players:
+            if peer is not None:
+                peer.send(*words)
+
+
+class Server:
+    """Сервер многих партий одновременно. Строки протокола - слова через
+    пробел, клетки передаются номерами Layout, цвет 1 ходит первым и
+    соединяет стороны '/'. Клиент -> сервер:
+    HELLO имя, NEW размер, JOIN партия, MATCH размер (к ждущей партии
+    этого размера или новая), MOVE партия клетка, LEAVE партия.
+    Сервер -> клиент: WELCOME имя, CREATED партия размер,
+    START партия размер цвет имя1 имя2, MOVE партия клетка,
+    END партия цвет_победителя_или_0, ERROR текст"""
+
+    def __init__(self, host='127.0.0.1', port=PORT):
+        self.host = host
+        self.port = port
+        self.sessions = {}
+        self.waiting = {}
+        self.names = set()
+        self._numbers = count(1)
+        self._server = None
+        self._commands = {'HELLO': self.hello, 'NEW': self.new,
+                          'JOIN': self.join, 'MATCH': self.match,
+                          'MOVE': self.move, 'LEAVE': self.leave}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host,
+                                                  self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        peer = Peer(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = decode(line)
+                if not words:
+                    continue
+                try:
+                    command = self._commands.get(words[0].upper())
+                    if command is None:
+                        raise ProtocolError(f'unknown command {words[0]}')
+                    if words[0].upper() != 'HELLO' and peer.name is None:
+                        raise ProtocolError('say HELLO first')
+                    command(peer, *words[1:])
+                except (ProtocolError, ValueError, TypeError) as error:
+                    peer.send('ERROR', error)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._disconnect(peer)
+            writer.close()
+
+    def hello(self, peer, *name):
+        if peer.name is not None:
+            raise ProtocolError('already said HELLO')
+        base = name = '_'.join(name) or 'Player'
+        for number in count(2):
+            if name not in self.names:
+                break
+            name = f'{base}-{number}'
+        self.names.add(name)
+        peer.name = name
+        peer.send('WELCOME', name)
+
+    def new(self, peer, size):
+        size = int(size)
+        if not 1 <= size <= 150:
+            raise ProtocolError(f'bad size {size}')
+        session = Session(next(self._numbers), size, peer)
+        self.sessions[session.number] = session
+        peer.sessions.add(session.number)
+        peer.send('CREATED', session.number, size)
+        return session
+
+    def join(self, peer, number):
+        session = self._get_session(number)
+        if session.players[1] is not None or session.players[0] is peer:
+            raise ProtocolError(f'game {number} is not open')
+        self._unwait(session)
+        session.players[1] = peer
+        peer.sessions.add(session.number)
+        names = [player.name for player in session.players]
+        for colour, player in enumerate(session.players, 1):
+            player.send('START', session.number, session.board.size, colour,
+                        *names)
+
+    def match(self, peer, size):
+        owners = self.waiting.setdefault(int(size), {})
+        for owner, sessions in owners.items():
+            if owner is not peer:
+                self.join(peer, sessions[0].number)
+                return
+        session = self.new(peer, size)
+        owners.setdefault(peer, deque()).append(session)
+
+    def _unwait(self, session):
+        """Убирает партию из ждущих соперника по MATCH"""
+        owners = self.waiting.get(session.board.size, {})
+        sessions = owners.get(session.players[0])
+        if sessions and session in sessions:
+            sessions.remove(session)
+            if not sessions:
+                del owners[session.players[0]]
+
+    def move(self, peer, number, index):
+        session = self._get_session(number)
+        board = session.board
+        if session.players[1] is None:
+            raise ProtocolError(f'game {number} has not started')
+        colour = 1 + len(board.moves) % 2
+        if session.players[colour - 1] is not peer:
+            raise ProtocolError(f'not your turn in game {number}')
+        index = int(index)
+        if not 0 <= index < board.layout.count or board.stones[index]:
+            raise ProtocolError(f'bad move {index} in game {number}')
+        winner = board.play(index, SIDES[colour], colour)
+        session.send('MOVE', session.number, index)
+        if winner or len(board.moves) == board.layout.count:
+            self._end(session, winner)
+
+    def leave(self, peer, number):
+        session = self._get_session(number)
+        if peer not in session.players:
+            raise ProtocolError(f'not your game {number}')
+        self._end(session, 2 - session.players.index(peer))
+
+    def _get_session(self, number):
+        session = self.sessions.get(int(number))
+        if session is None:
+            raise ProtocolError(f'no game {number}')
+        return session
+
+    def _end(self, session, winner):
+        if session.players[1] is None:
+            winner = 0
+        session.send('END', session.number, winner)
+        del self.sessions[session.number]
+        self._unwait(session)
+        for peer in session.players:
+            if peer is not None:
+                peer.sessions.discard(session.number)
+
+    def _disconnect(self, peer):
+        for number in [*peer.sessions]:
+            session = self.sessions[number]
+            self._end(session, 2 - session.players.index(peer))
+        self.names.discard(peer.name)
+
+
+class Client:
+    """Клиент на asyncio. Одно соединение может вести много партий"""
+
+    def __init__(self, reader, writer, name):
+        self.reader = reader
+        self.writer = writer
+        self.name = name
+
+    @classmethod
+    async def connect(cls, host, port, name):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(encode('HELLO', name))
+        words = decode(await reader.readline())
+        if words[:1] != ['WELCOME']:
+            writer.close()
+            raise ConnectionError(' '.join(words) or 'connection closed')
+        return cls(reader, writer, words[1])
+
+    async def send(self, *words):
+        self.writer.write(encode(*words))
+        await self.writer.drain()
+
+    async def receive(self):
+        """Слова следующего сообщения сервера, None после закрытия"""
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return None
+            words = decode(line)
+            if words:
+                return words
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class Bot:
+    """Компьютерный игрок роли role без графики: играет games партий
+    размера size через одно соединение. Ходы считаются в потоках на
+    копиях позиций, чтобы не задерживать другие партии, кроме мгновенных
+    случайных ходов INLINE_ROLES. Партии, не нашедшие соперника за
+    match_timeout секунд после последнего начала партии, покидаются"""
+
+    def __init__(self, client, role='AI', size=11, games=1, options=None,
+                 match_timeout=None):
+        self.client = client
+        self.role = role
+        self.size = size
+        self.games = games
+        self.options = options or {}
+        self.match_timeout = match_timeout
+        self.sessions = {}
+        self.waiting = set()
+
+    async def run(self):
+        """Результаты сыгранных партий {'game', 'colour', 'winner'} по
+        мере их завершения"""
+        client = self.client
+        loop = asyncio.get_running_loop()
+        for _ in range(self.games):
+            await client.send('MATCH', self.size)
+        results = []
+        remaining = self.games
+        deadline = None
+        if self.match_timeout is not None:
+            deadline = loop.time() + self.match_timeout
+        while remaining:
+            timeout = None
+            if self.waiting and deadline is not None:
+                timeout = max(0, deadline - loop.time())
+            try:
+                words = await asyncio.wait_for(client.receive(), timeout)
+            except asyncio.TimeoutError:
+                for number in self.waiting:
+                    await client.send('LEAVE', number)
+                deadline = None
+                continue
+            if words is None:
+                raise ConnectionError('server closed the connection')
+            command, *args = words
+            if command == 'ERROR':
+                raise ProtocolError(' '.join(args))
+            if command == 'CREATED':
+                self.waiting.add(int(args[0]))
+            elif command == 'START':
+                self.waiting.discard(int(args[0]))
+                if self.match_timeout is not None:
+                    deadline = loop.time() + self.match_timeout
+                self._start(*args)
+            elif command == 'MOVE':
+                self._move(int(args[0]), int(args[1]))
+            elif command == 'END':
+                number, winner = map(int, args)
+                remaining -= 1
+                if number in self.waiting:
+                    self.waiting.discard(number)
+                    continue
+                _, player, colour, _ = self.sessions.pop(number)
+                await loop.run_in_executor(None, player.close)
+                results.append({'game': number, 'colour': colour,
+                                'winner': winner})
+        return results
+
+    def _start(self, number, size, colour, *names):
+        game = Game(int(size), *names)
+        player = create_player(self.client.name, self.role, game,
+                               **self.options)
+        sides = dict(zip(names, ('/', '\\')))
+        self.sessions[int(number)] = [game, player, int(colour), sides]
+        self._think(int(number))
+
+    def _move(self, number, index):
+        session = self.sessions[number]
+        game = session[0]
+        session[0] = game.make_step(*game.layout.coordinates[index],
+                                    SIDES[game.colour])
+        self._think(number)
+
+    def _think(self, number):
+        game, player, colour, sides = self.sessions[number]
+        if game.colour == colour and not game.winner:
+            asyncio.ensure_future(self._play(number, game))
+
+    async def _play(self, number, game):
+        session = self.sessions.get(number)
+        if session is None:
+            return
+        player, sides = session[1], session[3]
+        if self.role in INLINE_ROLES:
+            step = player.choose(game, sides)
+        else:
+            step = await asyncio.get_running_loop().run_in_executor(
+                None, player.choose, game.copy(), sides)
+        if step is not None and self.sessions.get(number) is session and \
+                session[0] is game:
+            await self.client.send('MOVE', number, game.layout.index[step])
+
+
+class RemotePlayer(Player):
+    """Соперник по сети: его ходы приходят от сервера через put"""
+
+    def __init__(self, name, game):
+        super().__init__(name, game)
+        self.moves = queue.Queue()
+
+    def put(self, index):
+        self.moves.put(index)
+
+    def choose(self, game, sides, cancel=None):
+        while cancel is None or not cancel.is_set():
+            try:
+                index = self.moves.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            return game.layout.coordinates[index]
+        return None
+
+
+class Connection:
+    """Соединение с сервером для окна игры: чтение идёт в отдельном
+    потоке, слова сообщений передаются в callback(words) из него,
+    после закрытия - callback(['CLOSED'])"""
+
+    def __init__(self, host, port, name, callback, timeout=5):
+        self.socket = socket.create_connection((host, port), timeout)
+        self.file = self.socket.makefile('rb')
+        self.send('HELLO', name)
+        words = decode(self.file.readline())
+        if words[:1] != ['WELCOME']:
+            self.close()
+            raise ConnectionError(' '.join(words) or 'connection closed')
+        self.socket.settimeout(None)
+        self.name = words[1]
+        self.callback = callback
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def send(self, *words):
+        self.socket.sendall(encode(*words))
+
+    def _read(self):
+        try:
+            for line in self.file:
+                words = decode(line)
+                if words:
+                    self.callback(words)
+        except (OSError, ValueError):
+            pass
+        self.callback(['CLOSED'])
+
+    def close(self):
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+def get_network_players(game, name, colour):
+    """Игроки партии по сети для окна: человек цвета colour с именем name
+    и соперник RemotePlayer, по порядку цветов"""
+    names = game.player1, game.player2
+    players = [RemotePlayer(other, game) for other in names]
+    players[colour - 1] = Human(name, game)
+    return players
+
+
+async def _run_bots(args):
+    options = {}
+    if args.time_limit is not None:
+        options['time_limit'] = args.time_limit
+    clients = [await Client.connect(args.host, args.port, args.name)
+               for _ in range(args.connections)]
+    bots = [Bot(client, args.role, args.field_size, args.games, options,
+                args.match_timeout)
+            for client in clients]
+    try:
+        for results in await asyncio.gather(*(bot.run() for bot in bots)):
+            for result in results:
+                print(json.dumps(result))
+    finally:
+        for client in clients:
+            await client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        usage='%(prog)s serve|bot [OPTIONS]',
+        description='Nex network play')
+    parser.add_argument('mode', choices=['serve', 'bot'])
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Server address')
+    parser.add_argument('--port', '-p', type=int, default=PORT,
+                        help='Server port')
+    parser.add_argument('--name', type=str, default='Bot',
+                        help='Bot name')
+    parser.add_argument('--role', type=str, default='AI',
+                        choices=[role for role in PLAYER_TYPES
+                                 if role != 'Human'])
+    parser.add_argument('--field-size', '-n', type=int, default=11,
+                        help='Field size of bot games')
+    parser.add_argument('--games', '-g', type=int, default=1,
+                        help='Games of every bot connection')
+    parser.add_argument('--connections', '-c', type=int, default=1,
+                        help='Bot connections')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='MCTS and AlphaBeta seconds per move')
+    parser.add_argument('--match-timeout', type=float, default=30,
+                        help='Seconds to wait for opponents before leaving '
+                             'unmatched games')
+    args = parser.parse_args(argv)
+    if args.mode == 'serve':
+        asyncio.run(Server(args.host, args.port).serve_forever())
+    else:
+        asyncio.run(_run_bots(args))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,62 @@
 """Классы игроков"""
 
-from itertools import cycle
-from random import shuffle
-from classes import Game
+from array import array
+from random import Random
+from book import SIDES as BOOK_SIDES, get_book
+from classes import Game, get_changed_stones, get_other_side
+from evaluation import Evaluator
+import alphabeta
+import mcts
 
 
 class Player:
+    options = ()
+
     def __init__(self, name, game):
         self.name = name
         self.score = max(5 * round(game.size ** 2, -1), 100)
         self.penalty = 11
+        self.book = None
 
     def make_step(self, game, sides):
+        return self.play(game, self.choose(game, sides), sides)
+
+    def choose(self, game, sides, cancel=None):
+        """Координаты следующего хода или None. cancel - threading.Event,
+        по которому долгое обдумывание можно прервать"""
+        return None
+
+    def ponder(self, game, sides, cancel):
+        """Обдумывание на ходу соперника, пока не выставлен cancel"""
+        pass
+
+    def close(self):
+        """Освобождение ресурсов игрока (пулов процессов) после партии"""
         pass
 
+    def play(self, game, step, sides):
+        if step is None or game[step].player is not None:
+            return None
+        self.take_penalty(self.penalty)
+        return game.make_step(*step, side=sides[self.name])
+
     def take_penalty(self, penalty=11):
         self.score = max(0, self.score - penalty)
 
+    def _get_sides(self, game, sides):
+        """Стороны цветов камней {цвет: сторона} по сторонам игроков"""
+        side = sides[self.name]
+        colour = game.colour if game.player1 == self.name else \
+            3 - game.colour
+        return {colour: side, 3 - colour: get_other_side(side)}
+
+    def _get_book_step(self, game, sides):
+        """Ход из дебютной книги или None"""
+        if self.book is None or self._get_sides(game, sides) != BOOK_SIDES:
+            return None
+        move = self.book.choose(game.layout, game.board.stones)
+        return None if move is None else game.layout.coordinates[move]
+
 
 class Human(Player):
     def __init__(self, name: str, game: Game):
@@ -24,33 +64,181 @@ class Human(Player):
         self.step = None
         self.penalty = 10
 
-    def make_step(self, game, sides):
-        if self.step is not None and game[self.step].player is None:
-            result = game.make_step(*self.step, side=sides[self.name])
-            self.step = None
-            self.take_penalty(self.penalty)
-            return result
+    def choose(self, game, sides, cancel=None):
+        step, self.step = self.step, None
+        return step
 
     def set_step(self, step):
         self.step = step
 
 
 class AI(Player):
-    def __init__(self, name: str, game: Game):
+    """Случайные ходы из пула свободных клеток. Пул сверяется со своим
+    снимком камней по изменившимся клеткам, клетки удаляются из пула
+    перестановкой с последней, поэтому выбор и обновление стоят O(1).
+    Снимок не ссылается на позиции, поэтому choose в потоке обдумывания
+    не трогает общее поле интерфейса"""
+
+    options = ('seed',)
+
+    def __init__(self, name: str, game: Game, seed=None):
         super().__init__(name, game)
-        free_cells = [*game.cells.keys()]
-        shuffle(free_cells)
-        self.cycle = cycle(free_cells)
+        self.random = Random(seed)
+        self.stones = bytearray()
+        self.free = []
+        self.slots = array('i')
 
-    def make_step(self, game, sides):
-        for coords in self.cycle:
-            if game[coords].player is None:
-                self.take_penalty()
-                return game.make_step(*coords, side=sides[self.name])
+    def choose(self, game, sides, cancel=None):
+        self._sync(game)
+        if not self.free:
+            return None
+        index = self.free[self.random.randrange(len(self.free))]
+        return game.layout.coordinates[index]
+
+    def play(self, game, step, sides):
+        modified = super().play(game, step, sides)
+        if modified and len(self.stones) == modified.layout.count:
+            index = modified.layout.index[tuple(step)]
+            self.stones[index] = modified.board.stones[index]
+            self._remove(index)
+        elif modified:
+            self._sync(modified)
+        return modified
+
+    def _sync(self, game):
+        stones = game.board.stones
+        if len(self.stones) != len(stones):
+            self.free = [k for k, stone in enumerate(stones) if not stone]
+            self.slots = array('i', [-1]) * len(stones)
+            for slot, index in enumerate(self.free):
+                self.slots[index] = slot
+            self.stones = bytearray(stones)
+            return
+        for index in get_changed_stones(self.stones, stones):
+            self.stones[index] = stones[index]
+            if stones[index]:
+                self._remove(index)
+            else:
+                self._add(index)
+
+    def _add(self, index):
+        if self.slots[index] < 0:
+            self.slots[index] = len(self.free)
+            self.free.append(index)
+
+    def _remove(self, index):
+        slot = self.slots[index]
+        if slot < 0:
+            return
+        last = self.free.pop()
+        if last != index:
+            self.free[slot] = last
+            self.slots[last] = slot
+        self.slots[index] = -1
+
+
+class MCTS(Player):
+    """Поиск по дереву Монте-Карло с ограничением времени (в секундах)
+    или числа случайных партий на ход. При workers > 1 поиск идёт
+    параллельно в пуле процессов, пул закрывается close()"""
+
+    options = ('time_limit', 'playouts', 'seed', 'workers', 'book')
+
+    def __init__(self, name: str, game: Game, time_limit=0.04,
+                 playouts=None, seed=None, workers=1, book=None):
+        super().__init__(name, game)
+        self.book = get_book(book)
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.ponder_playouts = 100000
+        self.random = Random(seed)
+        self.engine = mcts.ParallelSearch(workers) if workers != 1 else None
+        self.tree = None
+
+    def _get_tree(self, game, sides):
+        """Дерево для позиции game. Дерево прошлого хода или обдумывания
+        переиспользуется, если позиция отличается от него на один ход"""
+        tree = self.tree
+        if (tree is None or tree.sides != sides or
+                not tree.follow(game.board.stones)):
+            tree = self.tree = mcts.Tree(game.copy().board, game.colour,
+                                         sides, self.random)
+        return tree
+
+    def choose(self, game, sides, cancel=None):
+        step = self._get_book_step(game, sides)
+        if step is not None:
+            return step
+        colour_sides = self._get_sides(game, sides)
+        if self.engine is not None:
+            move = self.engine.search(game.board, game.colour, colour_sides,
+                                      self.time_limit, self.playouts,
+                                      self.random, cancel)
+        else:
+            tree = self._get_tree(game, colour_sides)
+            tree.run(self.time_limit, self.playouts, cancel)
+            move = tree.best_move()
+            if move is not None:
+                tree.advance(move)
+        return None if move is None else game.layout.coordinates[move]
+
+    def ponder(self, game, sides, cancel):
+        if self.engine is None and not game.winner:
+            tree = self._get_tree(game, self._get_sides(game, sides))
+            tree.run(playouts=self.ponder_playouts, cancel=cancel)
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.close()
+
+
+class AlphaBeta(Player):
+    """Перебор с альфа-бета отсечениями и итеративным углублением до
+    исчерпания времени time_limit (в секундах) или глубины depth. Оценка
+    позиций пересчитывается после каждого хода, а не строится заново"""
+
+    options = ('time_limit', 'depth', 'width', 'seed', 'book')
+
+    def __init__(self, name: str, game: Game, time_limit=0.5, depth=None,
+                 width=16, seed=None, book=None):
+        super().__init__(name, game)
+        self.book = get_book(book)
+        if time_limit is None and depth is None:
+            time_limit = 0.5
+        self.time_limit = time_limit
+        self.depth = depth
+        self.width = width
+        self.random = Random(seed)
+        self.search = None
+
+    def _get_search(self, game, sides):
+        search = self.search
+        if (search is None or search.evaluator.sides != sides or
+                search.evaluator.layout is not game.layout):
+            evaluator = Evaluator.from_game(game, sides)
+            search = self.search = alphabeta.Search(evaluator,
+                                                    width=self.width,
+                                                    rng=self.random)
+        else:
+            search.evaluator.sync(game)
+        return search
+
+    def choose(self, game, sides, cancel=None):
+        step = self._get_book_step(game, sides)
+        if step is not None:
+            return step
+        search = self._get_search(game, self._get_sides(game, sides))
+        move, _ = search.run(game.colour, self.time_limit, self.depth,
+                             cancel)
+        return None if move is None else game.layout.coordinates[move]
+
+
+PLAYER_TYPES = {'AI': AI, 'MCTS': MCTS, 'AlphaBeta': AlphaBeta,
+                'Human': Human}
 
 
-def create_player(name, spinbox_value, game):
-    if spinbox_value == 'AI':
-        return AI(name, game)
-    else:
-        return Human(name, game)
+def create_player(name, spinbox_value, game, **options):
+    player_type = PLAYER_TYPES.get(spinbox_value, Human)
+    options = {key: value for key, value in options.items()
+               if key in player_type.options}
+    return player_type(name, game, **options)
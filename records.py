@@ -0,0 +1,206 @@
+"""Записи партий: компактный двоичный формат и текстовый в духе SGF"""
+
+import re
+import struct
+import sys
+from array import array
+from classes import Board, Game, get_layout
+
+MAGIC = b'NEXREC1\n'
+HEADER = struct.Struct('<HIB')
+SIDES = {1: '/', 2: '\\'}
+COLOURS = {1: 'B', 2: 'W'}
+PROPERTY = re.compile(r'([A-Z]+)\[((?:\\.|[^\]\\])*)\]')
+
+
+class GameRecord:
+    """Партия: размер поля, номера клеток ходов по порядку (первым ходит
+    цвет 1 со сторонами '/'), имена игроков и цвет победителя или 0"""
+
+    def __init__(self, size, moves, names=('One', 'Two'), winner=0):
+        self.size = size
+        self.moves = moves
+        self.names = tuple(names)
+        self.winner = winner
+
+    @classmethod
+    def from_game(cls, game):
+        """Запись ходов, которые привели к позиции game на её поле"""
+        moves = [index for index, *_ in game.board.moves]
+        names = (game.player1, game.player2)
+        if game.colour == 2:
+            names = names[::-1]
+        winner = names.index(game.winner) + 1 if game.winner else 0
+        return cls(game.size, moves, names, winner)
+
+    def __eq__(self, other):
+        return (isinstance(other, GameRecord) and
+                (self.size, self.names, self.winner) ==
+                (other.size, other.names, other.winner) and
+                list(self.moves) == list(other.moves))
+
+    def __len__(self):
+        return len(self.moves)
+
+    def positions(self, board=None):
+        """Позиции партии на одном поле: (поле, ход, цвет) перед каждым
+        ходом. Ход делается на месте после возврата управления"""
+        board = board or Board(self.size, self.names)
+        for ply, index in enumerate(self.moves):
+            colour = 1 + ply % 2
+            yield board, index, colour
+            board.play(index, SIDES[colour], colour)
+
+    def replay(self, board=None, moves=None):
+        """Поле после первых moves ходов (всех по умолчанию). Ходы
+        делаются на месте через Board.play, без копий позиций"""
+        board = board or Board(self.size, self.names)
+        for ply, index in enumerate(self.moves[:moves]):
+            colour = 1 + ply % 2
+            board.play(index, SIDES[colour], colour)
+        return board
+
+    def to_game(self, moves=None):
+        board = self.replay(moves=moves)
+        return Game.from_board(board, 1 + len(board.moves) % 2)
+
+    def to_text(self):
+        coordinates = get_layout(self.size).coordinates
+        names = [_escape(name) for name in self.names]
+        text = f'(;GM[Nex]SZ[{self.size}]PB[{names[0]}]PW[{names[1]}]'
+        if self.winner:
+            text += f'RE[{COLOURS[self.winner]}+]'
+        for ply, index in enumerate(self.moves):
+            i, j = coordinates[index]
+            text += f';{COLOURS[1 + ply % 2]}[{i},{j}]'
+        return text + ')'
+
+    @classmethod
+    def from_text(cls, text):
+        properties = [(name, re.sub(r'\\(.)', r'\1', value))
+                      for name, value in PROPERTY.findall(text)]
+        info = dict(properties)
+        if info.get('GM') != 'Nex' or 'SZ' not in info:
+            raise ValueError('not a Nex game record')
+        size = int(info['SZ'])
+        index = get_layout(size).index
+        moves = []
+        for name, value in properties:
+            if name in ('B', 'W'):
+                cell = tuple(map(int, value.split(',')))
+                if cell not in index:
+                    raise ValueError(f'move {value} is off the board')
+                moves.append(index[cell])
+        result = info.get('RE', '')[:1]
+        winner = {'B': 1, 'W': 2}.get(result, 0)
+        names = info.get('PB', 'One'), info.get('PW', 'Two')
+        return cls(size, moves, names, winner)
+
+
+def _read(file, size):
+    data = file.read(size)
+    if len(data) < size:
+        raise ValueError('game record is truncated')
+    return data
+
+
+def _check_moves(size, moves):
+    """ValueError, если номер клетки хода вне поля size"""
+    count = get_layout(size).count
+    for index in moves:
+        if not 0 <= index < count:
+            raise ValueError(f'move {index} is off the board')
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(']', '\\]')
+
+
+def write(file, record):
+    """Дописывает запись в двоичный файл, открытый на запись"""
+    names = [name.encode() for name in record.names]
+    if any(len(name) > 255 for name in names):
+        raise ValueError('player name is too long')
+    moves = array('H', record.moves)
+    if sys.byteorder == 'big':
+        moves.byteswap()
+    file.write(HEADER.pack(record.size, len(moves), record.winner))
+    for name in names:
+        file.write(bytes([len(name)]) + name)
+    file.write(moves.tobytes())
+
+
+def read(file):
+    """Записи двоичного файла по одной, без чтения файла целиком.
+    ValueError для обрезанной записи и ходов вне поля"""
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError('not a Nex game archive')
+    while True:
+        header = file.read(HEADER.size)
+        if not header:
+            return
+        if len(header) < HEADER.size:
+            raise ValueError('game record is truncated')
+        size, count, winner = HEADER.unpack(header)
+        names = []
+        for _ in range(2):
+            length = _read(file, 1)[0]
+            names.append(_read(file, length).decode())
+        moves = array('H')
+        moves.frombytes(_read(file, 2 * count))
+        if sys.byteorder == 'big':
+            moves.byteswap()
+        _check_moves(size, moves)
+        yield GameRecord(size, moves, names, winner)
+
+
+def is_text(path):
+    return path.endswith('.sgf')
+
+
+class Archive:
+    """Файл записей, открытый на запись: текстовый для .sgf, иначе
+    двоичный. Партии дописываются по одной"""
+
+    def __init__(self, path):
+        self.text = is_text(path)
+        if self.text:
+            self.file = open(path, 'w', encoding='utf-8')
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+
+    def write(self, record):
+        if self.text:
+            self.file.write(record.to_text() + '\n')
+        else:
+            write(self.file, record)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def save(path, records):
+    with Archive(path) as archive:
+        for record in records:
+            archive.write(record)
+
+
+def load(path):
+    """Записи файла любого из форматов по одной"""
+    with open(path, 'rb') as file:
+        binary = file.read(len(MAGIC)) == MAGIC
+    if binary:
+        with open(path, 'rb') as file:
+            yield from read(file)
+        return
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield GameRecord.from_text(line)
@@ -0,0 +1,175 @@
+"""Счётчики и гистограммы времени горячих мест игры и интерфейса"""
+
+import json
+import threading
+import weakref
+from functools import wraps
+from time import perf_counter
+
+BUCKETS = 32
+
+
+class Histogram:
+    """Гистограмма длительностей по корзинам степеней двойки
+    микросекунд: корзина k - от 2**(k-1) до 2**k мкс"""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Верхняя граница корзины, в которую попадает доля fraction
+        замеров, в секундах"""
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(2 ** bucket / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total, 'mean': self.mean,
+                'p50': self.percentile(0.5), 'p90': self.percentile(0.9),
+                'p99': self.percentile(0.99), 'max': self.max,
+                'buckets': self.buckets[:]}
+
+
+class Stats:
+    """Именованные счётчики и гистограммы. Замеры могут приходить из
+    потоков обдумывания, поэтому изменения идут под блокировкой"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'histograms': {name: histogram.to_dict() for name,
+                                   histogram in self.histograms.items()}}
+
+    def dump(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+            file.write('\n')
+
+    def lines(self):
+        """Короткие строки для показа поверх поля"""
+        data = self.to_dict()
+        lines = [f'{name}: {value}'
+                 for name, value in sorted(data['counters'].items())]
+        for name, histogram in sorted(data['histograms'].items()):
+            lines.append(f"{name}: {histogram['count']} x "
+                         f"{histogram['mean'] * 1e3:.2f} ms, "
+                         f"p99 {histogram['p99'] * 1e3:.2f} ms")
+        return lines
+
+
+STATS = Stats()
+enabled = False
+_patched = []
+_boards = weakref.WeakSet()
+
+
+def timed(function, name, stats=STATS):
+    """function с записью длительности вызовов в гистограмму name"""
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.record(name, perf_counter() - start)
+
+    return wrapper
+
+
+def instrument(owner, attribute, name=None, wrap=timed):
+    """Подменяет метод owner.attribute обёрткой wrap до disable()"""
+    original = owner.__dict__[attribute]
+    _patched.append((owner, attribute, original))
+    setattr(owner, attribute, wrap(original, name or
+                                   f'{owner.__name__}.{attribute}'))
+
+
+def _timed_make_step(function, name):
+    """make_step с замером. Board.play поля партии (объединение групп и
+    проверка победы) замеряется отдельно как 'win_detection': обёртка
+    ставится на само поле, а не на класс, поэтому поля перебора MCTS и
+    альфа-беты, созданные копированием, работают без замеров"""
+    timed_make_step = timed(function, name)
+
+    @wraps(function)
+    def wrapper(game, *args, **kwargs):
+        board = game.board
+        if 'play' not in board.__dict__:
+            board.play = timed(board.play, 'win_detection')
+            _boards.add(board)
+        result = timed_make_step(game, *args, **kwargs)
+        if result.winner and not game.winner:
+            STATS.count('wins')
+        return result
+
+    return wrapper
+
+
+def enable():
+    """Включает замеры ходов партии, проверки победы на поле партии и
+    выбора ходов игроками. Пока замеры выключены, горячие методы не
+    обёрнуты и ничего не стоят"""
+    global enabled
+    if enabled:
+        return
+    from classes import Game
+    from players import PLAYER_TYPES, Human
+
+    enabled = True
+    instrument(Game, 'make_step', 'make_step', _timed_make_step)
+    for player_type in PLAYER_TYPES.values():
+        if player_type is not Human and 'choose' in player_type.__dict__:
+            instrument(player_type, 'choose',
+                       f'choose.{player_type.__name__}')
+
+
+def disable():
+    global enabled
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
+    for board in list(_boards):
+        board.__dict__.pop('play', None)
+    _boards.clear()
+    enabled = False
@@ -0,0 +1,77 @@
+from random import Random
+from threading import Event
+from unittest import TestCase
+from alphabeta import WIN, Search
+from classes import Board
+from evaluation import SIDES, Evaluator
+
+
+def get_winning_moves(board, colour):
+    moves = []
+    for index, stone in enumerate(board.stones):
+        if not stone:
+            if board.play(index, SIDES[colour], colour):
+                moves.append(index)
+            board.undo()
+    return moves
+
+
+class SearchTest(TestCase):
+    def test_finds_winning_move(self):
+        board = Board(3)
+        layout = board.layout
+        moves = [((2, 0), 1), ((0, 0), 2), ((2, 1), 1), ((1, 1), 2)]
+        for coords, colour in moves:
+            board.play(layout.index[coords], SIDES[colour], colour)
+        search = Search(Evaluator(board))
+        move, value = search.run(1, depth=3)
+        self.assertEqual(move, layout.index[2, 2])
+        self.assertEqual(value, WIN - 1)
+
+    def test_blocks_opponent(self):
+        checked = 0
+        for seed in range(40):
+            rng = Random(seed)
+            board = Board(4)
+            cells = [*range(board.layout.count)]
+            rng.shuffle(cells)
+            for k, index in enumerate(cells[:6]):
+                board.play(index, SIDES[1 + k % 2], 1 + k % 2)
+            if board.winner:
+                continue
+            wins = {colour: get_winning_moves(board, colour)
+                    for colour in (1, 2)}
+            if wins[1] or len(wins[2]) != 1:
+                continue
+            move, _ = Search(Evaluator(board), rng=rng).run(1, depth=2)
+            self.assertEqual([move], wins[2])
+            checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_search_keeps_board(self):
+        board = Board(4)
+        board.play(5, '/', 1)
+        stones = board.stones[:]
+        parent = board.parent[:]
+        search = Search(Evaluator(board), width=8)
+        move, _ = search.run(2, depth=3)
+        self.assertFalse(board.stones[move])
+        self.assertEqual(board.stones, stones)
+        self.assertEqual(board.parent, parent)
+        self.assertEqual(search.depth, 3)
+        self.assertGreater(len(search.table), 0)
+
+    def test_time_limit_and_cancel(self):
+        search = Search(Evaluator(Board(6)))
+        move, _ = search.run(1, time_limit=0.05)
+        self.assertIsNotNone(move)
+        cancel = Event()
+        cancel.set()
+        move, _ = search.run(1, cancel=cancel)
+        self.assertIsNotNone(move)
+        self.assertFalse(any(search.evaluator.board.stones))
+
+    def test_full_board(self):
+        board = Board(1)
+        board.play(0, '/', 1)
+        self.assertEqual(Search(Evaluator(board)).run(2), (None, 0))
@@ -0,0 +1,95 @@
+from collections import deque
+from math import inf
+from random import Random
+from unittest import TestCase, skipUnless
+from classes import Game, get_layout
+from mcts import connects
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from batch import (connected, distances, features, legal_moves, stack,
+                       winners)
+
+
+def random_boards(size, count, seed, full=False):
+    rng = Random(seed)
+    board = Game(size).board
+    boards = []
+    for _ in range(count):
+        stones = bytearray(board.stones)
+        filled = len(stones) if full else rng.randrange(len(stones) + 1)
+        for index in rng.sample(range(len(stones)), filled):
+            stones[index] = rng.choice((1, 2))
+        boards.append(stones)
+    return boards
+
+
+def shortest_path(layout, stones, colour, side):
+    start, finish = layout.edges[side]
+    cost = [0 if stone == colour else 1 if not stone else None
+            for stone in stones]
+    distance = {k: cost[k] for k in start if cost[k] is not None}
+    queue = deque(sorted(distance, key=distance.get))
+    while queue:
+        k = queue.popleft()
+        for neighbour in layout.neighbours[k]:
+            if cost[neighbour] is None:
+                continue
+            value = distance[k] + cost[neighbour]
+            if value < distance.get(neighbour, inf):
+                distance[neighbour] = value
+                if cost[neighbour]:
+                    queue.append(neighbour)
+                else:
+                    queue.appendleft(neighbour)
+    return min((distance.get(k, inf) for k in finish), default=inf)
+
+
+@skipUnless(numpy, 'numpy is not installed')
+class BatchTest(TestCase):
+    def test_stack_and_legal_moves(self):
+        game = Game(3, '1', '2').make_step(2, 1, '/')
+        boards = stack([Game(3), game])
+        self.assertEqual(boards.shape, (2, 9))
+        mask = legal_moves(boards)
+        self.assertEqual(mask[0].sum(), 9)
+        self.assertFalse(mask[1, game.layout.index[2, 1]])
+
+    def test_winners_match_flood_fill(self):
+        for size in (1, 3, 6):
+            layout = get_layout(size)
+            boards = random_boards(size, 60, size)
+            boards += random_boards(size, 20, size, full=True)
+            result = winners(numpy.array(boards, dtype=numpy.uint8), size)
+            for stones, winner in zip(boards, result):
+                expected = 0
+                if connects(layout, stones, 2, '\\'):
+                    expected = 2
+                if connects(layout, stones, 1, '/'):
+                    expected = 1
+                self.assertEqual(winner, expected)
+
+    def test_distances_match_shortest_paths(self):
+        for size in (1, 3, 6):
+            layout = get_layout(size)
+            boards = random_boards(size, 40, size + 1)
+            array = numpy.array(boards, dtype=numpy.uint8)
+            for colour, side in ((1, '/'), (2, '\\')):
+                result = distances(array, size, colour, side)
+                for stones, distance in zip(boards, result):
+                    self.assertEqual(distance, shortest_path(
+                        layout, stones, colour, side))
+                self.assertSequenceEqual(
+                    list(connected(array, size, colour, side)),
+                    list(result == 0))
+
+    def test_features(self):
+        game = Game(3, '1', '2')
+        for x, y in [(2, 0), (0, 0), (2, 1), (1, 1), (2, 2)]:
+            game = game.make_step(x, y, '/' if game.colour == 1 else '\\')
+        result = features(stack([game]), 3)
+        self.assertSequenceEqual(list(result[0]), [3, 2, 0, numpy.inf, 1])
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+from benchmark import BENCHMARKS, compare, measure_import, run_benchmarks
+
+CORE = ['classes', 'players', 'tournament', 'records', 'history', 'book',
+        'build_book', 'evaluation', 'alphabeta', 'mcts', 'stats']
+
+
+class BenchmarkTest(TestCase):
+    def test_run_benchmarks(self):
+        names = [name for name in BENCHMARKS if not name.startswith('paint')]
+        results = run_benchmarks(names, [2, 3], repeat=1, min_time=0.001)
+        self.assertEqual(len(results), 2 * len(names))
+        self.assertTrue(all(value > 0 for value in results.values()))
+
+    def test_compare(self):
+        baseline = {'init/5': 1.0, 'make_step/5': 2.0}
+        results = {'init/5': 1.1, 'make_step/5': 3.0, 'playout/5': 9.0}
+        self.assertEqual(compare(results, baseline, 0.25),
+                         {'make_step/5': 1.5})
+
+    def test_measure_import(self):
+        self.assertGreater(measure_import('classes', repeat=1), 0)
+        self.assertIsNone(measure_import('no_such_module', repeat=1))
+
+    def get_imported(self, modules):
+        """Модули, загруженные импортом modules в отдельном процессе"""
+        code = (f'import sys, {", ".join(modules)}; '
+                'print(*sorted(sys.modules))')
+        directory = os.path.dirname(os.path.dirname(os.path.abspath(
+            __file__)))
+        return subprocess.run([sys.executable, '-c', code],
+                              cwd=directory, capture_output=True,
+                              text=True, check=True).stdout.split()
+
+    def test_core_imports(self):
+        modules = self.get_imported(CORE)
+        self.assertNotIn('PyQt5', modules)
+        self.assertNotIn('concurrent.futures', modules)
+
+    def test_graphics_help(self):
+        code = ('import runpy, sys\n'
+                'sys.argv = ["graphics.py", "--help"]\n'
+                'try:\n'
+                '    runpy.run_path("graphics.py", run_name="__main__")\n'
+                'except SystemExit:\n'
+                '    print(*sys.modules, file=sys.stderr)')
+        directory = os.path.dirname(os.path.dirname(os.path.abspath(
+            __file__)))
+        process = subprocess.run([sys.executable, '-c', code],
+                                 cwd=directory, capture_output=True,
+                                 text=True, check=True)
+        self.assertIn('Nex Game', process.stdout)
+        self.assertNotIn('PyQt5', process.stderr.split())
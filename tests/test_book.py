@@ -0,0 +1,94 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from book import (BOOK, SOLVED, Book, canonical, get_book, get_symmetries,
+                  read_entries, write_entries)
+from build_book import add_game, build, solve
+from classes import Game, get_layout
+from players import MCTS
+
+
+class BookTest(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.book')
+
+    def tearDown(self):
+        get_book.cache_clear()
+        self.directory.cleanup()
+
+    def test_symmetries(self):
+        for size in (1, 2, 5):
+            symmetries = get_symmetries(size)
+            self.assertEqual(symmetries[0], tuple(range(size * size)))
+            layout = get_layout(size)
+            for symmetry in symmetries:
+                for k, neighbours in enumerate(layout.neighbours):
+                    self.assertEqual({symmetry[n] for n in neighbours},
+                                     set(layout.neighbours[symmetry[k]]))
+
+    def test_canonical_matches_hash(self):
+        game = Game(4, 'One', 'Two')
+        for x, y in [(3, 1), (2, 0), (4, 2)]:
+            game = game.make_step(x, y, '/\\'[game.colour - 1])
+            key, _ = canonical(game.layout, game.board.stones)
+            if len(get_symmetries(4)) == 1:
+                self.assertEqual(key, game.hash)
+            self.assertLessEqual(key, game.hash)
+
+    def test_write_and_read(self):
+        entries = {(5, 1): [2.5, 4, BOOK], (5, 2): [1.0, 4, BOOK],
+                   (3, 0): [1.0, 1, SOLVED], (2 ** 64 - 1, 7): [0.0, 2, BOOK]}
+        write_entries(self.path, entries)
+        self.assertEqual(read_entries(self.path), entries)
+        with Book(self.path) as book:
+            self.assertEqual(len(book), 4)
+            self.assertIsInstance(book.keys, memoryview)
+            self.assertEqual(book.get(5), [(1, 2.5, 4, BOOK),
+                                           (2, 1.0, 4, BOOK)])
+            self.assertEqual(book.get(4), [])
+
+    def test_choose(self):
+        layout = get_layout(2)
+        stones = bytearray(layout.count)
+        key, symmetry = canonical(layout, stones)
+        entries = {}
+        for record, winner in [([1, 0], 1), ([1, 2], 1), ([2, 1], 2)]:
+            add_game(entries, 2, [symmetry.index(k) for k in record],
+                     winner, 1)
+        write_entries(self.path, entries)
+        self.assertEqual(get_book(self.path).choose(layout, stones),
+                         symmetry.index(1))
+        entries[key, 3] = [0.0, 1, SOLVED]
+        write_entries(self.path, entries)
+        self.assertEqual(get_book(self.path).choose(layout, stones),
+                         symmetry.index(3))
+        self.assertIsNone(get_book(self.path).choose(
+            layout, bytearray([1, 0, 0, 0])))
+        self.assertIsNone(get_book(None))
+        self.assertIsNone(get_book(self.path + '.missing'))
+
+    def test_solve(self):
+        layout = get_layout(2)
+        entries = {}
+        self.assertEqual(solve(entries, 2, bytearray(layout.count), 1), 1.0)
+        (key, move), value = entries.popitem()
+        self.assertEqual(value, [1.0, 1, SOLVED])
+        self.assertEqual(key, canonical(layout, bytearray(4))[0])
+
+    def test_build_and_play(self):
+        count = build(self.path, 2, 2, plies=2, solve_cells=4,
+                      options={'playouts': 20, 'time_limit': None})
+        self.assertEqual(len(read_entries(self.path)), count)
+        self.assertTrue(all(flag == SOLVED for _, _, flag
+                            in read_entries(self.path).values()))
+        self.assertEqual(build(self.path, 2, 1, plies=2, solve_cells=4,
+                               options={'playouts': 20, 'time_limit': None}),
+                         count)
+
+        game = Game(2, 'One', 'Two')
+        player = MCTS('One', game, time_limit=None, playouts=1,
+                      book=self.path)
+        step = player.choose(game, {'One': '/', 'Two': '\\'})
+        move = get_book(self.path).choose(game.layout, game.board.stones)
+        self.assertEqual(step, game.layout.coordinates[move])
@@ -1,6 +1,6 @@
 from itertools import zip_longest
 from unittest import TestCase
-from classes import Game, Cell, get_valid_rounded_coordinates
+from classes import Board, Game, get_layout, get_valid_rounded_coordinates
 
 
 def parse_game_field(field: str):
@@ -26,19 +26,6 @@ def enumerate_players_steps(field: str):
     return first, second
 
 
-class CellTest(TestCase):
-    def test_single_cel_work_with_sides(self):
-        cell = Cell()
-        self.assertFalse(cell.sides_connected())
-        cell.update_side('0')
-        self.assertFalse(cell.sides_connected())
-        cell.update_side('=')
-        cell.update_side('0')
-        self.assertTrue(cell.sides_connected())
-        cell.update_side('=')
-        self.assertTrue(cell.sides_connected())
-
-
 class GameTests(TestCase):
     def test_init(self):
         field = Game(5)
@@ -100,3 +87,125 @@ class GameTests(TestCase):
         self.assertSequenceEqual(coords, [])
         coords = set(get_valid_rounded_coordinates(-0.5, 0.1, g))
         self.assertSetEqual(coords, {(0, 0)})
+
+    def test_make_step_keeps_old_positions(self):
+        game = Game(3, '1', '2')
+        first = game.make_step(0, 0, '/')
+        second = first.make_step(1, 0, '\\')
+        branch = first.make_step(1, 1, '\\')
+        self.assertIsNone(game[0, 0].player)
+        self.assertEqual(first[0, 0].player, '1')
+        self.assertIsNone(first[1, 0].player)
+        self.assertEqual(second[1, 0].player, '2')
+        self.assertIsNone(second[1, 1].player)
+        self.assertEqual(branch[1, 1].player, '2')
+        self.assertIsNone(branch[1, 0].player)
+        self.assertEqual(second.player1, '1')
+
+    def test_winner_survives_checkout(self):
+        game = Game(2, '1', '2')
+        start = game
+        for x, y in [(1, 0), (0, 0), (2, 0)]:
+            game = game.make_step(x, y, '/')
+        self.assertEqual(game.winner, '1')
+        self.assertFalse(start[1, 0].sides_connected())
+        self.assertTrue(game[2, 0].sides_connected())
+
+    def test_board_play_undo(self):
+        game = Game(3, '1', '2')
+        board = game.board
+        index = board.layout.index
+        self.assertFalse(board.play(index[0, 0], '/', 1))
+        board.play(index[1, 0], '/', 1)
+        self.assertEqual(game[0, 0].player, '1')
+        board.undo()
+        board.undo()
+        self.assertFalse(board.moves)
+        self.assertFalse(any(board.stones))
+        self.assertSequenceEqual(board.parent, range(len(board.parent)))
+        self.assertFalse(any(board.rank))
+
+    def test_long_chain_winner(self):
+        game = Game(150, '1', '2')
+        board = game.board
+        index = board.layout.index
+        for i in range(2 * 150 - 2):
+            self.assertFalse(board.play(index[i, 0], '/', 1))
+        self.assertEqual(board.play(index[2 * 150 - 2, 0], '/', 1), 1)
+        self.assertTrue(game[0, 0].sides_connected())
+        board.undo()
+        self.assertFalse(board.winner)
+        self.assertFalse(game[0, 0].sides_connected())
+
+    def test_copy_is_independent(self):
+        game = Game(3, '1', '2').make_step(0, 0, '/')
+        copy = game.copy()
+        moved = copy.make_step(1, 0, '\\')
+        self.assertEqual(moved[0, 0].player, '1')
+        self.assertIsNone(game[1, 0].player)
+        self.assertEqual(copy.player1, game.player1)
+
+    def test_cells_mapping(self):
+        game = Game(4, '1', '2').make_step(2, 1, '/')
+        self.assertEqual(len(game.cells), 16)
+        self.assertEqual(len(set(game.cells.keys())), 16)
+        self.assertEqual(game.cells[2, 1], game[2, 1])
+        players = [cell.player for cell in game.cells.values()]
+        self.assertEqual(players.count('1'), 1)
+        self.assertEqual(players.count(None), 15)
+
+    def test_layout_is_shared(self):
+        game = Game(4)
+        self.assertIs(game.layout, Game(4).layout)
+        self.assertIs(game.layout, game.copy().layout)
+        self.assertIs(game.layout, get_layout(4))
+
+    def test_layout_neighbour_arrays(self):
+        layout = get_layout(5)
+        self.assertEqual(len(layout.neighbour_offsets), layout.count + 1)
+        for index, neighbours in enumerate(layout.neighbours):
+            start = layout.neighbour_offsets[index]
+            end = layout.neighbour_offsets[index + 1]
+            self.assertSequenceEqual(layout.neighbour_indices[start:end],
+                                     neighbours)
+            for neighbour in neighbours:
+                self.assertIn(index, layout.neighbours[neighbour])
+
+    def test_get_changed_cells(self):
+        game = Game(4, '1', '2')
+        first = game.make_step(2, 1, '/')
+        second = first.make_step(3, 0, '\\')
+        index = game.layout.index
+        self.assertEqual(game.get_changed_cells(first), [index[2, 1]])
+        self.assertEqual(second.get_changed_cells(first), [index[3, 0]])
+        self.assertEqual(sorted(game.get_changed_cells(second)),
+                         sorted([index[2, 1], index[3, 0]]))
+        self.assertEqual(second.get_changed_cells(second.copy()), [])
+        branch = game.make_step(3, 0, '/').make_step(2, 1, '\\')
+        self.assertEqual(second.get_changed_cells(branch),
+                         sorted([index[2, 1], index[3, 0]]))
+        same = game.make_step(3, 0, '/').make_step(2, 1, '\\')
+        self.assertEqual(branch.get_changed_cells(same), [])
+        self.assertEqual(branch.get_changed_cells(first), [index[2, 1],
+                                                           index[3, 0]])
+        game = Game(11, '1', '2')
+        first = game.make_step(0, 0, '/').make_step(12, 3, '\\')
+        second = game.make_step(20, 0, '/').copy()
+        self.assertEqual(first.get_changed_cells(second),
+                         sorted(game.layout.index[coords]
+                                for coords in ((0, 0), (12, 3), (20, 0))))
+
+    def test_hash(self):
+        game = Game(4, '1', '2')
+        self.assertEqual(game.hash, 0)
+        first = game.make_step(2, 1, '/').make_step(3, 0, '\\')
+        first = first.make_step(0, 0, '/')
+        second = game.make_step(0, 0, '/').make_step(3, 0, '\\')
+        second = second.make_step(2, 1, '/')
+        self.assertEqual(first.hash, second.hash)
+        self.assertNotEqual(first.hash, first.make_step(1, 1, '\\').hash)
+        self.assertNotEqual(game.hash, game.make_step(1, 1, '/').hash)
+        self.assertEqual(game.hash, 0)
+        self.assertEqual(first.copy().hash, first.hash)
+        board = Board.from_stones(4, first.board.stones, {1: '/', 2: '\\'})
+        self.assertEqual(board.hash, first.hash)
@@ -0,0 +1,98 @@
+from math import inf
+from random import Random
+from unittest import TestCase
+from classes import Board, Game
+from evaluation import INF, SIDES, Evaluator
+
+
+def get_state(evaluator):
+    board = evaluator.board
+    count = evaluator.layout.count
+
+    def get_name(node):
+        if node < count and not board.stones[node]:
+            return node
+        root = board.find(node)
+        return frozenset(k for k in range(count + 4) if board.find(k) == root)
+
+    return {colour: ({get_name(node): {get_name(other): round(value, 6)
+                                       for other, value in neighbours.items()}
+                      for node, neighbours in graph.items()},
+                     [list(values) for values in evaluator.distances[colour]])
+            for colour, graph in evaluator.graphs.items()}
+
+
+class EvaluatorTest(TestCase):
+    def test_incremental_matches_rebuild(self):
+        for size in (2, 4, 6, 8):
+            rng = Random(size)
+            evaluator = Evaluator(Board(size))
+            cells = [*range(evaluator.layout.count)]
+            rng.shuffle(cells)
+            colour = 1
+            for index in cells:
+                if evaluator.board.winner:
+                    break
+                evaluator.play(index, colour)
+                if rng.random() < 0.3:
+                    evaluator.undo()
+                    continue
+                colour = 3 - colour
+                fresh = Evaluator(Board.from_stones(
+                    size, evaluator.board.stones, SIDES))
+                self.assertEqual(get_state(evaluator), get_state(fresh))
+                for colour_ in (1, 2):
+                    expected = fresh.resistance(colour_)
+                    self.assertAlmostEqual(evaluator.resistance(colour_),
+                                           expected, delta=0.01 * expected)
+
+    def test_undo_restores_state(self):
+        evaluator = Evaluator(Board(5))
+        state = get_state(evaluator)
+        for k, index in enumerate([12, 6, 13, 7, 0]):
+            evaluator.play(index, 1 + k % 2)
+        for _ in range(5):
+            evaluator.undo()
+        self.assertEqual(get_state(evaluator), state)
+        self.assertFalse(any(evaluator.board.stones))
+
+    def test_single_cell(self):
+        evaluator = Evaluator(Board(1))
+        self.assertEqual(evaluator.two_distance(1), 2)
+        self.assertAlmostEqual(evaluator.resistance(1), 2.0)
+        self.assertEqual(evaluator.evaluate(1), 0)
+        evaluator.play(0, 1)
+        self.assertEqual(evaluator.evaluate(1), inf)
+        self.assertEqual(evaluator.evaluate(2), -inf)
+        self.assertEqual(evaluator.resistance(1), 0.0)
+        self.assertEqual(evaluator.resistance(2), inf)
+
+    def test_blocked_colour(self):
+        evaluator = Evaluator(Board(2))
+        for index in range(evaluator.layout.count):
+            if evaluator.layout.sides['/'][index] & 1:
+                evaluator.play(index, 2)
+        self.assertEqual(evaluator.two_distance(1), 2 * INF)
+        self.assertEqual(evaluator.resistance(1), inf)
+        self.assertLess(evaluator.evaluate(1), 0)
+
+    def test_stone_improves_own_evaluation(self):
+        evaluator = Evaluator(Board(5))
+        center = evaluator.layout.index[4, 2]
+        evaluator.play(center, 1)
+        self.assertGreater(evaluator.evaluate(1), 0)
+        self.assertGreater(evaluator.evaluate_resistance(1), 0)
+        self.assertLess(evaluator.evaluate_resistance(2), 0)
+
+    def test_sync_follows_game(self):
+        game = Game(4, 'One', 'Two')
+        evaluator = Evaluator.from_game(game)
+        positions = [game]
+        for x, y in [(3, 1), (2, 1), (4, 1), (1, 0)]:
+            game = game.make_step(x, y, SIDES[game.colour])
+            positions.append(game)
+        for position in positions[::-1] + positions:
+            evaluator.sync(position)
+            self.assertEqual(evaluator.board.stones, position.board.stones)
+            fresh = Evaluator.from_game(position)
+            self.assertEqual(get_state(evaluator), get_state(fresh))
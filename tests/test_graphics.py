@@ -0,0 +1,98 @@
+import os
+from importlib.util import find_spec
+from random import Random
+from unittest import TestCase, skipIf
+from classes import Game
+
+if find_spec('PyQt5') is not None:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from PyQt5.QtCore import QPoint, QRect
+    from PyQt5.QtGui import QImage, QPixmap, QRegion
+    from graphics import (LOD_RADIUS, ZOOM_STEP, Gui, HexGeometry,
+                          LodImage)
+    from players import AI
+
+
+@skipIf(find_spec('PyQt5') is None, 'PyQt5 is not installed')
+class HexGeometryTest(TestCase):
+    def test_get_cells(self):
+        rng = Random(1)
+        for size in (1, 5, 11, 30):
+            for radius in (2, 3.5, 10, 25):
+                hexes = HexGeometry(size, radius)
+                width = int(4 * size * radius)
+                height = int(2 * size * radius)
+                for _ in range(20):
+                    left = rng.randrange(-50, width)
+                    top = rng.randrange(-50, height)
+                    rect = QRect(left, top, rng.randrange(1, width),
+                                 rng.randrange(1, height))
+                    cells = [*hexes.get_cells(rect)]
+                    expected = [index
+                                for index, cell in enumerate(hexes.rects)
+                                if cell.intersects(rect)]
+                    self.assertEqual(len(cells), len(set(cells)))
+                    self.assertLessEqual(set(expected), set(cells))
+                    near = rect.adjusted(-1, -1, 1, 1)
+                    self.assertTrue(all(hexes.rects[index].intersects(near)
+                                        for index in cells))
+
+    def test_get_cells_outside(self):
+        hexes = HexGeometry(5, 10)
+        self.assertEqual([*hexes.get_cells(QRect(-100, -100, 50, 50))], [])
+        self.assertEqual([*hexes.get_cells(QRect(0, -100, 100, 50))], [])
+        self.assertEqual([*hexes.get_cells(QRect(0, 0, 1000, 1000))],
+                         [*range(25)])
+
+
+@skipIf(find_spec('PyQt5') is None, 'PyQt5 is not installed')
+class LodTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = (QtWidgets.QApplication.instance() or
+                   QtWidgets.QApplication([]))
+
+    def setUp(self):
+        game = Game(20, 'One', 'Two')
+        moves = [*game.cells.keys()]
+        Random(2).shuffle(moves)
+        for k, (x, y) in enumerate(moves[:150]):
+            game = game.make_step(x, y, '/\\'[k % 2])
+        self.game = game
+        self.gui = Gui(game, (AI('One', game), AI('Two', game)), 10, None)
+        self.gui.stop()
+
+    def tearDown(self):
+        self.gui.deleteLater()
+
+    def test_lod_image(self):
+        hexes = self.gui.hexes
+        stones = self.game.board.stones
+        width, height = (2 * value for value in self.gui.center)
+        for scale in (0.2, 0.3):
+            lod = LodImage(hexes, int(width * scale), int(height * scale),
+                           stones, scale)
+            for index, (x, y) in enumerate(hexes.centers):
+                self.assertEqual(
+                    lod.image.pixelIndex(int(x * scale), int(y * scale)),
+                    stones[index] + 1)
+
+    def test_zoom_levels(self):
+        gui = self.gui
+        pixmap = QPixmap(400, 300)
+        for k in range(8):
+            gui.set_scale(ZOOM_STEP ** -k, QPoint())
+            gui.settle_timer.stop()
+            gui.render(pixmap, QPoint(), QRegion(QRect(0, 0, 400, 300)))
+            lod = gui.radius * gui.scale < LOD_RADIUS
+            self.assertEqual(gui.is_lod(), lod)
+            if lod:
+                self.assertIsNotNone(gui.lod_image)
+                self.assertEqual(gui.lod_image.image.size(), gui.size())
+                self.assertEqual(gui.lod_image.image.format(),
+                                 QImage.Format_Indexed8)
+                self.assertIsNone(gui.board_layer)
+            else:
+                self.assertIsNone(gui.lod_image)
+                self.assertEqual(gui.board_layer.size(), gui.size())
@@ -0,0 +1,98 @@
+from random import Random
+from unittest import TestCase
+from classes import Game
+from history import History
+from records import GameRecord
+
+SIDES = {1: '/', 2: '\\'}
+
+
+def play_random(history, count, seed=0):
+    rng = Random(seed)
+    game = history.game
+    positions = [(bytes(game.board.stones), game.colour)]
+    for _ in range(count):
+        free = [k for k, stone in enumerate(game.board.stones) if not stone]
+        index = rng.choice(free)
+        game = game.make_step(*game.layout.coordinates[index],
+                              SIDES[game.colour])
+        history.push(game)
+        positions.append((bytes(game.board.stones), game.colour))
+    return positions
+
+
+class HistoryTest(TestCase):
+    def test_undo_redo(self):
+        history = History(Game(5, 'A', 'B'))
+        positions = play_random(history, 10)
+        for ply in range(9, -1, -1):
+            game = history.undo()
+            self.assertEqual((bytes(game.board.stones), game.colour),
+                             positions[ply])
+        self.assertFalse(history.can_undo())
+        self.assertIs(history.undo(), history.game)
+        for ply in range(1, 11):
+            game = history.redo()
+            self.assertEqual(bytes(game.board.stones), positions[ply][0])
+        self.assertFalse(history.can_redo())
+
+    def test_goto_snapshots(self):
+        history = History(Game(7, 'A', 'B'), interval=4)
+        positions = play_random(history, 30, seed=1)
+        self.assertEqual(sorted(history._snapshots), [0, 4, 8, 12, 16, 20,
+                                                      24, 28])
+        for ply in (0, 30, 3, 17, 16, 29, 1, 22, 22, 9, 30):
+            game = history.goto(ply)
+            self.assertEqual(history.ply, ply)
+            self.assertEqual((bytes(game.board.stones), game.colour),
+                             positions[ply])
+            expected = Game(7, 'A', 'B')
+            for index, side in history.moves[:ply]:
+                expected = expected.make_step(
+                    *expected.layout.coordinates[index], side)
+            self.assertEqual(game.hash, expected.hash)
+
+    def test_push_truncates(self):
+        history = History(Game(5, 'A', 'B'), interval=2)
+        play_random(history, 6)
+        history.goto(3)
+        game = history.game
+        free = game.board.stones.index(0)
+        game = game.make_step(*game.layout.coordinates[free],
+                              SIDES[game.colour])
+        history.push(game)
+        self.assertEqual(len(history), 4)
+        self.assertFalse(history.can_redo())
+        self.assertEqual(sorted(history._snapshots), [0, 2, 4])
+        self.assertEqual(bytes(history.goto(4).board.stones),
+                         bytes(game.board.stones))
+        with self.assertRaises(ValueError):
+            history.push(Game(5, 'A', 'B'))
+
+    def test_record(self):
+        history = History(Game(5, 'A', 'B'))
+        play_random(history, 7, seed=2)
+        history.goto(5)
+        record = history.to_record()
+        self.assertEqual(record.names, ('A', 'B'))
+        self.assertEqual(record.moves,
+                         [index for index, _ in history.moves[:5]])
+        self.assertEqual(record.to_game().hash, history.game.hash)
+
+        loaded = History.from_record(GameRecord(5, record.moves, ('C', 'D')),
+                                     interval=2)
+        self.assertEqual(len(loaded), 5)
+        self.assertEqual(loaded.game.hash, history.game.hash)
+        self.assertEqual(loaded.undo().hash, history.undo().hash)
+        for moves in ([0, 25], [-1], [3, 4, 3]):
+            with self.assertRaises(ValueError):
+                History.from_record(GameRecord(5, moves))
+
+    def test_record_prefix(self):
+        root = GameRecord(5, [0, 7, 12], ('A', 'B')).to_game()
+        history = History(root)
+        play_random(history, 2)
+        record = history.to_record()
+        self.assertEqual(record.moves[:3], [0, 7, 12])
+        self.assertEqual(record.names, ('A', 'B'))
+        self.assertEqual(record.to_game().hash, history.game.hash)
@@ -0,0 +1,108 @@
+import threading
+from random import Random
+from time import perf_counter
+from unittest import TestCase
+from classes import Board, Game, get_layout
+from mcts import connects, playout, search, ParallelSearch, Tree
+
+
+SIDES = {1: '/', 2: '\\'}
+
+
+class MCTSTest(TestCase):
+    def test_connects(self):
+        layout = get_layout(3)
+        stones = bytearray(layout.count)
+        for coords in [(2, 0), (2, 1)]:
+            stones[layout.index[coords]] = 1
+        self.assertFalse(connects(layout, stones, 1, '/'))
+        stones[layout.index[2, 2]] = 2
+        self.assertFalse(connects(layout, stones, 1, '/'))
+        stones[layout.index[2, 2]] = 1
+        self.assertTrue(connects(layout, stones, 1, '/'))
+        self.assertFalse(connects(layout, stones, 2, '/'))
+
+    def test_playout_keeps_board(self):
+        game = Game(5, '1', '2').make_step(2, 1, '/')
+        stones = game.board.stones[:]
+        winner = playout(game.layout, game.board.stones, 2, SIDES, Random(1))
+        self.assertIn(winner, (0, 1, 2))
+        self.assertEqual(game.board.stones, stones)
+
+    def test_search_keeps_board(self):
+        game = Game(4, '1', '2').make_step(0, 0, '/')
+        board = game.board
+        stones = board.stones[:]
+        parent = board.parent[:]
+        tree = Tree(board, game.colour, SIDES, Random(2))
+        self.assertEqual(tree.run(playouts=200), 200)
+        self.assertEqual(board.stones, stones)
+        self.assertEqual(board.parent, parent)
+        self.assertEqual(len(board.moves), 1)
+        self.assertEqual(sum(child.visits for child in tree.root.children),
+                         200)
+
+    def test_expands_free_cells_once(self):
+        game = Game(3, '1', '2')
+        for x, y in [(1, 0), (0, 0), (2, 1)]:
+            game = game.make_step(x, y, '/' if game.colour == 1 else '\\')
+        tree = Tree(game.board, game.colour, SIDES, Random(5))
+        tree.run(playouts=300)
+        moves = [child.move for child in tree.root.children]
+        free = [k for k, stone in enumerate(game.board.stones) if not stone]
+        self.assertEqual(sorted(moves), free)
+        for child in tree.root.children:
+            grandchildren = [node.move for node in child.children]
+            self.assertEqual(len(grandchildren), len(set(grandchildren)))
+            self.assertNotIn(child.move, grandchildren)
+
+    def test_search_finds_winning_move(self):
+        game = Game(3, '1', '2')
+        for x, y in [(1, 0), (0, 0), (2, 1), (4, 0)]:
+            game = game.make_step(x, y, '/' if game.colour == 1 else '\\')
+        move = search(game.board, game.colour, SIDES, playouts=300,
+                      rng=Random(3))
+        winner = game.make_step(*game.layout.coordinates[move], '/').winner
+        self.assertEqual(winner, '1')
+
+
+class ParallelSearchTest(TestCase):
+    def test_from_stones(self):
+        game = Game(3, '1', '2')
+        for x, y in [(2, 0), (0, 0), (2, 1), (1, 1), (2, 2)]:
+            game = game.make_step(x, y, '/' if game.colour == 1 else '\\')
+        board = Board.from_stones(3, game.board.stones, SIDES)
+        self.assertEqual(board.stones, game.board.stones)
+        self.assertEqual(board.winner, 1)
+        self.assertFalse(board.moves)
+
+    def test_parallel_search(self):
+        game = Game(4, '1', '2').make_step(1, 0, '/')
+        engine = ParallelSearch(2)
+        try:
+            move = engine.search(game.board, game.colour, SIDES,
+                                 playouts=100, rng=Random(4))
+        finally:
+            engine.close()
+        self.assertIsNotNone(move)
+        self.assertFalse(game.board.stones[move])
+
+    def test_parallel_cancel(self):
+        game = Game(5, '1', '2')
+        engine = ParallelSearch(2)
+        cancel = threading.Event()
+        timer = threading.Timer(0.2, cancel.set)
+        timer.start()
+        start = perf_counter()
+        try:
+            move = engine.search(game.board, game.colour, SIDES,
+                                 time_limit=30, rng=Random(5), cancel=cancel)
+            self.assertIsNone(move)
+            self.assertLess(perf_counter() - start, 10)
+            move = engine.search(game.board, game.colour, SIDES,
+                                 playouts=20, rng=Random(6),
+                                 cancel=threading.Event())
+        finally:
+            timer.cancel()
+            engine.close()
+        self.assertIsNotNone(move)
@@ -0,0 +1,117 @@
+import asyncio
+import queue
+import threading
+from unittest import IsolatedAsyncioTestCase, TestCase
+from classes import Game
+from network import (Bot, Client, Connection, RemotePlayer, Server, decode,
+                     encode)
+
+
+class ProtocolTest(TestCase):
+    def test_encode(self):
+        self.assertEqual(encode('MOVE', 3, 17), b'MOVE 3 17\n')
+        self.assertEqual(decode(b'START 1 5 2 A B\r\n'),
+                         ['START', '1', '5', '2', 'A', 'B'])
+
+    def test_remote_player(self):
+        game = Game(3, 'A', 'B')
+        player = RemotePlayer('B', game)
+        cancel = threading.Event()
+        cancel.set()
+        self.assertIsNone(player.choose(game, {}, cancel))
+        player.put(4)
+        self.assertEqual(player.choose(game, {}),
+                         game.layout.coordinates[4])
+
+
+class ServerTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await Server(port=0).start()
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        await self.server.close()
+
+    async def connect(self, name):
+        client = await Client.connect('127.0.0.1', self.server.port, name)
+        self.clients.append(client)
+        return client
+
+    async def test_game(self):
+        first = await self.connect('A')
+        second = await self.connect('A')
+        self.assertEqual(second.name, 'A-2')
+        await first.send('NEW', 2)
+        self.assertEqual(await first.receive(), ['CREATED', '1', '2'])
+        await second.send('JOIN', 1)
+        self.assertEqual(await first.receive(),
+                         ['START', '1', '2', '1', 'A', 'A-2'])
+        self.assertEqual(await second.receive(),
+                         ['START', '1', '2', '2', 'A', 'A-2'])
+
+        await second.send('MOVE', 1, 0)
+        self.assertEqual((await second.receive())[0], 'ERROR')
+        await first.send('MOVE', 1, 0)
+        self.assertEqual(await second.receive(), ['MOVE', '1', '0'])
+        self.assertEqual(await first.receive(), ['MOVE', '1', '0'])
+        await second.send('MOVE', 1, 0)
+        self.assertEqual((await second.receive())[0], 'ERROR')
+        await second.send('LEAVE', 1)
+        self.assertEqual(await first.receive(), ['END', '1', '1'])
+        self.assertEqual(self.server.sessions, {})
+
+    async def test_disconnect(self):
+        first = await self.connect('A')
+        second = await self.connect('B')
+        await first.send('MATCH', 3)
+        await second.send('MATCH', 3)
+        await first.receive()
+        await first.receive()
+        await second.close()
+        self.clients.remove(second)
+        self.assertEqual(await first.receive(), ['END', '1', '1'])
+        self.assertNotIn('B', self.server.names)
+
+    async def test_bots(self):
+        games = 100
+        bots = [Bot(await self.connect(name), 'AI', 3, games, {'seed': k})
+                for k, name in enumerate(('A', 'B'))]
+        first, second = await asyncio.wait_for(
+            asyncio.gather(*(bot.run() for bot in bots)), 30)
+        self.assertEqual(len(first), games)
+        self.assertEqual(sorted(result['game'] for result in first),
+                         sorted(result['game'] for result in second))
+        winners = {result['game']: result['winner'] for result in first}
+        for result in second:
+            self.assertEqual(winners[result['game']], result['winner'])
+        self.assertEqual(self.server.sessions, {})
+        self.assertEqual(self.server.waiting, {3: {}})
+
+    async def test_bots_match_timeout(self):
+        bots = [Bot(await self.connect(name), 'AI', 3, 1, {'seed': k}, 0.2)
+                for k, name in enumerate('ABC')]
+        results = await asyncio.wait_for(
+            asyncio.gather(*(bot.run() for bot in bots)), 10)
+        self.assertEqual(sorted(map(len, results)), [0, 1, 1])
+        self.assertEqual(self.server.sessions, {})
+
+    async def test_connection(self):
+        messages = queue.Queue()
+        connection = await asyncio.to_thread(
+            Connection, '127.0.0.1', self.server.port, 'Human',
+            messages.put)
+        bot = Bot(await self.connect('Bot'), 'AI', 2, 1)
+        connection.send('MATCH', 2)
+        task = asyncio.ensure_future(bot.run())
+        words = await asyncio.to_thread(messages.get, timeout=5)
+        self.assertEqual(words[0], 'CREATED')
+        words = await asyncio.to_thread(messages.get, timeout=5)
+        self.assertEqual(words, ['START', '1', '2', '1', 'Human', 'Bot'])
+        connection.send('MOVE', 1, 0)
+        self.assertEqual(await asyncio.to_thread(messages.get, timeout=5),
+                         ['MOVE', '1', '0'])
+        connection.close()
+        self.assertEqual(await asyncio.wait_for(task, 5),
+                         [{'game': 1, 'colour': 2, 'winner': 2}])
@@ -1,6 +1,7 @@
+import threading
 from unittest import TestCase
 from classes import Game
-from players import Player, Human, AI, create_player
+from players import Player, Human, AI, MCTS, AlphaBeta, create_player
 
 
 class PlayersTest(TestCase):
@@ -56,8 +57,98 @@ class PlayersTest(TestCase):
 
         self.assertEqual(count, 1)
 
+    def test_AI_seed(self):
+        sides = {self.name1: '/', self.name2: '\\'}
+        games = []
+        for _ in range(2):
+            players = [AI(self.name1, self.game, seed=3),
+                       AI(self.name2, self.game, seed=4)]
+            game = self.game
+            for k in range(20):
+                game = players[k % 2].make_step(game, sides)
+            games.append(game)
+        self.assertEqual(games[0].hash, games[1].hash)
+
+    def test_AI_full_board(self):
+        game = Game(3, self.name1, self.name2)
+        ai = AI(self.name1, game, seed=1)
+        sides = {self.name1: '/', self.name2: '\\'}
+        for _ in range(game.layout.count):
+            game = game.make_step(*ai.choose(game, sides), '/')
+        self.assertIsNone(ai.choose(game, sides))
+        self.assertEqual(ai.free, [])
+        self.assertIsNone(ai.make_step(game, sides))
+
+    def test_AI_sync(self):
+        ai = AI(self.name1, self.game, seed=2)
+        sides = {self.name1: '/'}
+        game = self.game
+        positions = [game]
+        for _ in range(30):
+            game = game.make_step(*ai.choose(game, sides), '/')
+            positions.append(game)
+        for game in (positions[10], positions[25].copy(), positions[0]):
+            ai.choose(game, sides)
+            free = [k for k, stone in enumerate(game.board.stones)
+                    if not stone]
+            self.assertEqual(sorted(ai.free), free)
+            for slot, index in enumerate(ai.free):
+                self.assertEqual(ai.slots[index], slot)
+
+    def test_AI_thread(self):
+        ai = AI(self.name1, self.game, seed=3)
+        sides = {self.name1: '/', self.name2: '\\'}
+        game = ai.make_step(self.game, sides)
+        free = game.board.stones.index(0)
+        game = game.make_step(*game.layout.coordinates[free], '\\')
+        board = game.board
+        version = board.version
+        steps = []
+        thread = threading.Thread(
+            target=lambda: steps.append(ai.choose(game.copy(), sides)))
+        thread.start()
+        thread.join()
+        self.assertIs(board.version, version)
+        self.assertIsNone(game[steps[0]].player)
+
+    def test_MCTS_close(self):
+        self.assertIsNone(MCTS(self.name1, self.game).engine)
+        player = MCTS(self.name1, self.game, time_limit=None, playouts=20,
+                      seed=1, workers=2)
+        self.assertTrue(player.make_step(self.game, {self.name1: '/'}))
+        self.assertIsNotNone(player.engine._executor)
+        player.close()
+        self.assertIsNone(player.engine._executor)
+
+    def test_MCTS(self):
+        mcts = MCTS(self.name1, self.game, time_limit=None, playouts=50,
+                    seed=1)
+        self.game = mcts.make_step(self.game, {self.name1: '/'})
+        self.assertTrue(self.game)
+        players = [cell.player for cell in self.game.cells.values()]
+        self.assertEqual(players.count(self.name1), 1)
+        self.assertEqual(self.game.player1, self.name2)
+
+    def test_AlphaBeta(self):
+        player = AlphaBeta(self.name1, self.game, time_limit=None, depth=1,
+                           seed=1)
+        sides = {self.name1: '/', self.name2: '\\'}
+        self.game = player.make_step(self.game, sides)
+        previous = self.game.make_step(5, 2, '\\')
+        self.game = player.make_step(previous, sides)
+        players = [cell.player for cell in self.game.cells.values()]
+        self.assertEqual(players.count(self.name1), 2)
+        self.assertEqual(player.search.evaluator.board.stones,
+                         previous.board.stones)
+
     def test_create_player(self):
         player = create_player('Vupsen', 'Human', self.game)
         self.assertTrue(isinstance(player, Human))
         player = create_player('Pupsen', AI.__name__, self.game)
         self.assertTrue(isinstance(player, AI))
+        player = create_player('Pupsen', MCTS.__name__, self.game)
+        self.assertTrue(isinstance(player, MCTS))
+        player = create_player('Pupsen', AlphaBeta.__name__, self.game,
+                               time_limit=0.1, playouts=10)
+        self.assertTrue(isinstance(player, AlphaBeta))
+        self.assertEqual(player.time_limit, 0.1)
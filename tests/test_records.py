@@ -0,0 +1,102 @@
+import io
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from classes import Game
+from records import MAGIC, Archive, GameRecord, load, read, save, write
+
+
+def play(size, steps, names=('One', 'Two')):
+    game = Game(size, *names)
+    for x, y in steps:
+        game = game.make_step(x, y, '/\\'[game.colour - 1])
+    return game
+
+
+class RecordsTest(TestCase):
+    def setUp(self):
+        self.game = play(3, [(2, 0), (0, 0), (2, 1), (1, 1), (2, 2)],
+                         ('Bi]ba', 'Бо\\ба'))
+        self.record = GameRecord.from_game(self.game)
+
+    def test_from_game(self):
+        self.assertEqual(self.record.size, 3)
+        self.assertEqual(self.record.names, ('Bi]ba', 'Бо\\ба'))
+        self.assertEqual(self.record.winner, 1)
+        self.assertEqual(len(self.record), 5)
+        unfinished = GameRecord.from_game(play(4, [(3, 1), (2, 0), (4, 1)]))
+        self.assertEqual(unfinished.names, ('One', 'Two'))
+        self.assertEqual(unfinished.winner, 0)
+
+    def test_replay(self):
+        game = self.record.to_game()
+        self.assertEqual(game.hash, self.game.hash)
+        self.assertEqual(game.winner, 'Bi]ba')
+        self.assertEqual(GameRecord.from_game(game), self.record)
+        board = self.record.replay(moves=2)
+        self.assertEqual(len(board.moves), 2)
+        game = self.record.to_game(3)
+        self.assertEqual(game.colour, 2)
+        self.assertEqual(game.player1, 'Бо\\ба')
+        game = game.make_step(1, 1, '\\')
+        self.assertEqual(game.board.stones,
+                         self.record.replay(moves=4).stones)
+
+    def test_positions(self):
+        seen = [(bytes(board.stones), move, colour)
+                for board, move, colour in self.record.positions()]
+        self.assertEqual([move for _, move, _ in seen], self.record.moves)
+        self.assertEqual([colour for *_, colour in seen], [1, 2, 1, 2, 1])
+        self.assertFalse(any(seen[0][0]))
+        self.assertEqual(seen[-1][0],
+                         bytes(self.record.replay(moves=4).stones))
+
+    def test_text(self):
+        text = self.record.to_text()
+        self.assertTrue(text.startswith('(;GM[Nex]SZ[3]'))
+        self.assertIn('RE[B+]', text)
+        self.assertEqual(GameRecord.from_text(text), self.record)
+        with self.assertRaises(ValueError):
+            GameRecord.from_text('(;GM[Go]SZ[19])')
+
+    def test_binary_stream(self):
+        records = [self.record, GameRecord(150, list(range(22500)))]
+        file = io.BytesIO()
+        file.write(MAGIC)
+        for record in records:
+            write(file, record)
+        self.assertLess(len(file.getvalue()), 46000)
+        file.seek(0)
+        stream = read(file)
+        self.assertEqual(next(stream), records[0])
+        self.assertEqual(file.tell(), len(MAGIC) + 7 + 6 + 10 + 10)
+        self.assertEqual(next(stream), records[1])
+        self.assertEqual(list(stream), [])
+
+    def test_corrupt(self):
+        file = io.BytesIO()
+        file.write(MAGIC)
+        write(file, self.record)
+        data = file.getvalue()
+        for end in (len(MAGIC) + 3, len(MAGIC) + 7, len(MAGIC) + 10,
+                    len(data) - 1):
+            with self.assertRaises(ValueError):
+                list(read(io.BytesIO(data[:end])))
+        file = io.BytesIO()
+        file.write(MAGIC)
+        write(file, GameRecord(3, [0, 9]))
+        file.seek(0)
+        with self.assertRaises(ValueError):
+            list(read(file))
+        with self.assertRaises(ValueError):
+            GameRecord.from_text('(;GM[Nex]SZ[3];B[5,0])')
+
+    def test_save_and_load(self):
+        with TemporaryDirectory() as directory:
+            for name in ('games.nex', 'games.sgf'):
+                path = os.path.join(directory, name)
+                save(path, [self.record, self.record])
+                self.assertEqual(list(load(path)), [self.record] * 2)
+                with Archive(path) as archive:
+                    archive.write(self.record)
+                self.assertEqual(list(load(path)), [self.record])
@@ -0,0 +1,85 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+import stats
+from classes import Board, Game
+from players import AI, MCTS
+from stats import Histogram, Stats, STATS
+
+
+class HistogramTest(TestCase):
+    def test_buckets(self):
+        histogram = Histogram()
+        for seconds in (0.5e-6, 3e-6, 3e-6, 1e-3):
+            histogram.add(seconds)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.buckets[0], 1)
+        self.assertEqual(histogram.buckets[2], 2)
+        self.assertEqual(histogram.buckets[10], 1)
+        self.assertEqual(histogram.percentile(0.5), 4e-6)
+        self.assertEqual(histogram.percentile(1), 1e-3)
+        self.assertAlmostEqual(histogram.mean, 1.0065e-3 / 4)
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.mean, 0)
+        self.assertEqual(histogram.percentile(0.99), 0)
+
+
+class StatsTest(TestCase):
+    def tearDown(self):
+        stats.disable()
+        STATS.reset()
+
+    def test_dump(self):
+        data = Stats()
+        data.count('moves')
+        data.count('moves', 2)
+        data.record('paint', 0.002)
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stats.json')
+            data.dump(path)
+            with open(path) as file:
+                dumped = json.load(file)
+        self.assertEqual(dumped['counters'], {'moves': 3})
+        self.assertEqual(dumped['histograms']['paint']['count'], 1)
+        self.assertEqual(len(data.lines()), 2)
+
+    def test_enable(self):
+        make_step = Game.make_step
+        play = Board.play
+        stats.enable()
+        self.assertTrue(stats.enabled)
+        self.assertIsNot(Game.make_step, make_step)
+        self.assertIs(Board.play, play)
+        game = Game(2, 'A', 'B')
+        players = AI('A', game, seed=1), AI('B', game, seed=2)
+        sides = {'A': '/', 'B': '\\'}
+        for k in range(game.layout.count):
+            game = players[k % 2].make_step(game, sides)
+        data = STATS.to_dict()
+        moves = data['histograms']['make_step']['count']
+        self.assertGreater(moves, 0)
+        self.assertEqual(moves, game.layout.count)
+        self.assertEqual(data['histograms']['choose.AI']['count'], moves)
+        self.assertEqual(data['histograms']['win_detection']['count'],
+                         moves)
+        self.assertEqual(data['counters'].get('wins', 0),
+                         1 if game.winner else 0)
+
+        game = Game(4, 'A', 'B')
+        game = game.make_step(0, 0, '/')
+        MCTS('B', game, time_limit=None, playouts=50).choose(
+            game, {'A': '/', 'B': '\\'})
+        data = STATS.to_dict()
+        self.assertEqual(data['histograms']['win_detection']['count'],
+                         moves + 1)
+
+        stats.disable()
+        self.assertFalse(stats.enabled)
+        self.assertIs(Game.make_step, make_step)
+        self.assertNotIn('play', game.board.__dict__)
+        Game(2).make_step(0, 0, '/')
+        self.assertEqual(STATS.to_dict()['histograms']['make_step']['count'],
+                         moves + 1)
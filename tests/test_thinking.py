@@ -0,0 +1,43 @@
+from queue import Queue
+from time import sleep
+from unittest import TestCase
+from classes import Game
+from players import AI, MCTS
+from thinking import Thinker
+
+
+class ThinkerTest(TestCase):
+    def setUp(self) -> None:
+        self.game = Game(5, 'Biba', 'Boba')
+        self.sides = {'Biba': '/', 'Boba': '\\'}
+        self.results = Queue()
+        self.thinker = Thinker(lambda game, step: self.results.put(
+            (game, step)))
+
+    def test_think(self):
+        self.thinker.think(AI('Biba', self.game), self.game, self.sides)
+        game, step = self.results.get(timeout=5)
+        self.assertIs(game, self.game)
+        self.assertIsNone(self.game[step].player)
+
+    def test_cancel(self):
+        player = MCTS('Biba', self.game, time_limit=60)
+        self.thinker.think(player, self.game, self.sides)
+        self.assertTrue(self.thinker.busy)
+        self.thinker.cancel()
+        self.assertFalse(self.thinker.busy)
+        self.assertTrue(self.results.empty())
+
+    def test_ponder_keeps_tree(self):
+        player = MCTS('Boba', self.game, time_limit=None, playouts=10)
+        self.thinker.ponder(player, self.game, self.sides)
+        while player.tree is None or player.tree.root.visits < 50:
+            sleep(0.01)
+        self.thinker.cancel()
+        tree = player.tree
+        game = self.game.make_step(2, 1, '/')
+        self.thinker.think(player, game, self.sides)
+        _, step = self.results.get(timeout=5)
+        self.assertIsNone(game[step].player)
+        self.assertIs(player.tree, tree)
+        self.assertEqual(tree.board.stones[game.layout.index[step]], 2)
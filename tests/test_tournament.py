@@ -0,0 +1,61 @@
+import json
+import os
+import random
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+from records import load
+from tournament import main, play_game, run
+
+
+class TournamentTest(TestCase):
+    def test_play_game(self):
+        state = random.getstate()
+        result = play_game(4, 'AI', 'AI', seed=1)
+        self.assertEqual(random.getstate(), state)
+        self.assertIn(result['winner'], ('One', 'Two', None))
+        self.assertGreater(result['moves'], 0)
+        self.assertEqual(len(result['hash']), 16)
+        self.assertEqual(result, dict(play_game(4, 'AI', 'AI', seed=1),
+                                      time=result['time'],
+                                      times=result['times']))
+
+    def test_play_game_closes_players(self):
+        with mock.patch('players.Player.close') as close:
+            play_game(3, 'AI', 'AI', seed=2)
+        self.assertEqual(close.call_count, 2)
+
+    def test_run_alternate(self):
+        results = [*run(3, 'MCTS', 'AI', 4, alternate=True,
+                        options={'time_limit': None, 'playouts': 10})]
+        self.assertEqual([result['game'] for result in results],
+                         [0, 1, 2, 3])
+        self.assertEqual(results[1]['players'], {'Two': 'AI',
+                                                 'One': 'MCTS'})
+
+    def test_run_parallel(self):
+        results = [*run(3, 'AI', 'AI', 3, workers=2)]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[2]['seed'], 2)
+
+    def test_main(self):
+        with mock.patch('sys.stdout', new=StringIO()) as output:
+            main(['-n', '3', '-g', '2', '-w', '1'])
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['size'], 3)
+
+    def test_main_record(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.nex')
+            with mock.patch('sys.stdout', new=StringIO()) as output:
+                main(['-n', '3', '-g', '2', '-w', '1', '--record', path])
+            results = [json.loads(line)
+                       for line in output.getvalue().splitlines()]
+            records = [*load(path)]
+        self.assertEqual(len(records), 2)
+        for result, record in zip(results, records):
+            self.assertNotIn('record', result)
+            self.assertEqual(len(record), result['moves'])
+            self.assertEqual(format(record.to_game().hash, '016x'),
+                             result['hash'])
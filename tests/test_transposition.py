@@ -0,0 +1,33 @@
+from unittest import TestCase
+from transposition import (TranspositionTable, ENTRY_SIZE, EXACT, LOWER,
+                           UPPER)
+
+
+class TranspositionTableTest(TestCase):
+    def test_memory_cap(self):
+        table = TranspositionTable(memory=100 * ENTRY_SIZE)
+        self.assertEqual(table.capacity, 100)
+        for key in range(1000):
+            table.put(key * 7919 + 1, 1, 0.5)
+        self.assertLessEqual(len(table), 100)
+
+    def test_put_get(self):
+        table = TranspositionTable(memory=10 * ENTRY_SIZE)
+        self.assertIsNone(table.get(12345))
+        table.put(12345, 3, -0.25, LOWER, 7)
+        self.assertEqual(table.get(12345), (3, -0.25, LOWER, 7))
+        self.assertIsNone(table.get(12355))
+
+    def test_replacement(self):
+        table = TranspositionTable(memory=10 * ENTRY_SIZE)
+        table.put(5, 4, 1.0)
+        self.assertFalse(table.put(15, 2, 2.0, UPPER))
+        self.assertEqual(table.get(5)[1], 1.0)
+        self.assertTrue(table.put(15, 4, 2.0, UPPER))
+        self.assertIsNone(table.get(5))
+        table.new_search()
+        self.assertTrue(table.put(25, 1, 3.0, EXACT))
+        self.assertEqual(table.get(25), (1, 3.0, EXACT, -1))
+        self.assertEqual(len(table), 1)
+        table.clear()
+        self.assertIsNone(table.get(25))
@@ -1,5 +1,6 @@
 from unittest import TestCase
-from utilites import distance, get_rhombus, get_rhombuses
+from utilites import (distance, get_rhombus, get_rhombuses, get_cell_at,
+                      get_cell_center, sin60)
 
 
 class UtilitesTest(TestCase):
@@ -34,3 +35,32 @@ class UtilitesTest(TestCase):
         self.assertSequenceEqual(inner, get_rhombus(center, shoulder, diff))
         self.assertSequenceEqual(outer, get_rhombus(center, shoulder + diff,
                                                     diff))
+
+    def test_get_cell_at_centers(self):
+        for size in (1, 2, 5, 11):
+            for radius in (5, 25):
+                for i in range(2 * size - 1):
+                    row = i + 1 if i < size else 2 * size - i - 1
+                    for j in range(row):
+                        x, y = get_cell_center(i, j, size, radius)
+                        self.assertEqual(get_cell_at(x, y, size, radius),
+                                         (i, j))
+
+    def test_get_cell_at_nearest(self):
+        size, radius = 5, 20
+        center = get_cell_center(4, 2, size, radius)
+        for dx, dy in [(0, 0.9), (0.8, 0.4), (-0.8, -0.4), (0.3, -0.9)]:
+            point = (center[0] + dx * radius * sin60,
+                     center[1] + dy * radius * 0.5)
+            self.assertEqual(get_cell_at(*point, size, radius), (4, 2))
+        for i, j in [(3, 1), (5, 1), (4, 3)]:
+            x, y = get_cell_center(i, j, size, radius)
+            self.assertEqual(get_cell_at(x + 0.3 * (center[0] - x),
+                                         y + 0.3 * (center[1] - y),
+                                         size, radius), (i, j))
+
+    def test_get_cell_at_outside(self):
+        self.assertIsNone(get_cell_at(0, 0, 5, 20))
+        self.assertIsNone(get_cell_at(-100, 50, 5, 20))
+        x, y = get_cell_center(8, 0, 5, 20)
+        self.assertIsNone(get_cell_at(x, y + 30, 5, 20))
@@ -0,0 +1,49 @@
+"""Фоновое обдумывание ходов"""
+
+import threading
+
+
+class Thinker:
+    """Считает ходы компьютерных игроков в фоновом потоке. Найденный ход
+    передаётся в callback(game, step) из рабочего потока, поэтому
+    callback должен быть потокобезопасным (например, сигналом Qt)"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.game = None
+        self._thread = None
+        self._cancel = threading.Event()
+
+    @property
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def think(self, player, game, sides):
+        """Ход игрока player в позиции game"""
+        self.cancel()
+        self.game = game
+        self._start(self._think, player, game.copy(), game, sides)
+
+    def ponder(self, player, game, sides):
+        """Обдумывание игроком player хода соперника в позиции game"""
+        self.cancel()
+        self._start(player.ponder, game.copy(), sides)
+
+    def cancel(self):
+        self._cancel.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.game = None
+
+    def _start(self, target, *args):
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=target,
+                                        args=(*args, self._cancel),
+                                        daemon=True)
+        self._thread.start()
+
+    def _think(self, player, snapshot, game, sides, cancel):
+        step = player.choose(snapshot, sides, cancel)
+        if not cancel.is_set():
+            self.callback(game, step)
@@ -0,0 +1,149 @@
+"""Пакетный запуск партий компьютерных игроков без графики"""
+
+import argparse
+import json
+import sys
+from time import perf_counter
+from classes import Game
+from players import PLAYER_TYPES, Human, create_player
+import records
+
+ROLES = [name for name, player_type in PLAYER_TYPES.items()
+         if player_type is not Human]
+
+
+def play_game(size, first, second, names=('One', 'Two'), seed=None,
+              options=None, record=False):
+    """Партия first против second. Первый игрок соединяет стороны '/',
+    второй - '\\', как в графическом интерфейсе. При record в результат
+    добавляются номера клеток ходов по порядку"""
+    options = dict(options or {}, seed=seed)
+    game = Game(size, *names)
+    players = (create_player(names[0], first, game, **options),
+               create_player(names[1], second, game, **options))
+    sides = {names[0]: '/', names[1]: '\\'}
+    times = [0.0, 0.0]
+    index = 0
+    moves = []
+    start = perf_counter()
+    try:
+        while not game.winner:
+            step_start = perf_counter()
+            modified = players[index].make_step(game, sides)
+            times[index] += perf_counter() - step_start
+            if not modified:
+                break
+            moves.extend(game.get_changed_cells(modified))
+            game = modified
+            index = 1 - index
+    finally:
+        for player in players:
+            player.close()
+    result = {
+        'size': size,
+        'players': {name: role for name, role in zip(names, (first, second))},
+        'seed': seed,
+        'winner': game.winner,
+        'moves': len(moves),
+        'hash': format(game.hash, '016x'),
+        'scores': {player.name: player.score for player in players},
+        'times': {player.name: time for player, time in zip(players, times)},
+        'time': perf_counter() - start,
+    }
+    if record:
+        result['record'] = moves
+    return result
+
+
+def get_record(result):
+    """Запись партии по результату play_game(..., record=True)"""
+    names = [*result['players']]
+    winner = names.index(result['winner']) + 1 if result['winner'] else 0
+    return records.GameRecord(result['size'], result['record'], names,
+                              winner)
+
+
+def _play_game(args):
+    return play_game(*args)
+
+
+def run(size, first, second, games, workers=1, seed=0, alternate=False,
+        options=None, record=False):
+    """Результаты партий по мере их завершения (в порядке номеров).
+    При alternate в нечётных партиях игроки меняются ролями"""
+    tasks = []
+    for number in range(games):
+        roles = (first, second)
+        names = ('One', 'Two')
+        if alternate and number % 2:
+            roles = roles[::-1]
+            names = names[::-1]
+        tasks.append((size, *roles, names, seed + number, options, record))
+    if workers == 1:
+        results = map(_play_game, tasks)
+        for number, result in enumerate(results):
+            yield dict(result, game=number)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(_play_game, tasks,
+                               chunksize=max(1, games // (workers * 16)))
+        for number, result in enumerate(results):
+            yield dict(result, game=number)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        usage='%(prog)s [OPTIONS]',
+        description='Nex batch games')
+    parser.add_argument('--field-size', '-n', type=int, default=11,
+                        help='Field size')
+    parser.add_argument('--first', '-f', type=str, default='MCTS',
+                        choices=ROLES, help='first player role')
+    parser.add_argument('--second', '-s', type=str, default='AI',
+                        choices=ROLES, help='second player role')
+    parser.add_argument('--games', '-g', type=int, default=100,
+                        help='Number of games')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Processes (0 for all cores)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the first game')
+    parser.add_argument('--alternate', action='store_true',
+                        help='Swap roles every second game')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='MCTS and AlphaBeta seconds per move')
+    parser.add_argument('--playouts', type=int, default=None,
+                        help='MCTS playouts per move')
+    parser.add_argument('--book', type=str, default=None,
+                        help='Opening book file for MCTS and AlphaBeta')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='JSONL file (stdout by default)')
+    parser.add_argument('--record', type=str, default=None,
+                        help='Game archive (.sgf for text, binary otherwise)')
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.time_limit is not None or args.playouts is not None:
+        options = {'time_limit': args.time_limit, 'playouts': args.playouts}
+    if args.book:
+        options['book'] = args.book
+    output = open(args.output, 'w') if args.output else sys.stdout
+    archive = records.Archive(args.record) if args.record else None
+    try:
+        for result in run(args.field_size, args.first, args.second,
+                          args.games, args.workers or None, args.seed,
+                          args.alternate, options, archive is not None):
+            if archive is not None:
+                archive.write(get_record(result))
+                del result['record']
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if archive is not None:
+            archive.close()
+
+
+if __name__ == '__main__':
+    main()
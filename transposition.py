@@ -0,0 +1,59 @@
+"""Таблица транспозиций"""
+
+from array import array
+
+EXACT, LOWER, UPPER = 0, 1, 2
+ENTRY_SIZE = 8 + 8 + 4 + 1 + 1 + 1
+
+
+class TranspositionTable:
+    """Таблица позиций по ключу Зобриста (Game.hash, Board.hash) с числом
+    слотов по ограничению памяти memory в байтах. Слот определяется
+    ключом; занятый другой позицией слот заменяется, если запись осталась
+    от прошлого поиска (new_search) или новая глубина не меньше"""
+
+    def __init__(self, memory=16 * 2 ** 20):
+        self.capacity = max(1, memory // ENTRY_SIZE)
+        self.keys = array('Q', bytes(8 * self.capacity))
+        self.values = array('d', bytes(8 * self.capacity))
+        self.moves = array('i', bytes(4 * self.capacity))
+        self.depths = bytearray(self.capacity)
+        self.flags = bytearray(self.capacity)
+        self.ages = bytearray(self.capacity)
+        self.generation = 1
+        self.used = 0
+
+    def __len__(self):
+        return self.used
+
+    def new_search(self):
+        self.generation = self.generation % 255 + 1
+
+    def get(self, key):
+        """(глубина, оценка, тип оценки, ход) или None"""
+        slot = key % self.capacity
+        if self.ages[slot] and self.keys[slot] == key:
+            self.ages[slot] = self.generation
+            return (self.depths[slot], self.values[slot], self.flags[slot],
+                    self.moves[slot])
+        return None
+
+    def put(self, key, depth, value, flag=EXACT, move=-1):
+        slot = key % self.capacity
+        age = self.ages[slot]
+        if not age:
+            self.used += 1
+        elif (self.keys[slot] != key and age == self.generation and
+              self.depths[slot] > depth):
+            return False
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.moves[slot] = move
+        self.depths[slot] = min(depth, 255)
+        self.flags[slot] = flag
+        self.ages[slot] = self.generation
+        return True
+
+    def clear(self):
+        self.ages = bytearray(self.capacity)
+        self.used = 0
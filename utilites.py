@@ -20,3 +20,43 @@ def get_rhombuses(center, shoulder, radius):
     inner = get_rhombus(center, shoulder, radius)
     outer = get_rhombus(center, shoulder + radius, radius)
     return inner, outer
+
+
+def get_cell_center(i, j, size, radius):
+    """Центр клетки (i, j) поля со стороной size на экране"""
+    distance = radius * sin60
+    center = radius * (sin60 * size + 1)
+    if i < size:
+        x = center + (2 * j - i) * distance
+    else:
+        x = center + (2 * j - 2 * size + i + 2) * distance
+    y = (3 * i + (1 + 1 / sin60) * 2) * radius / 2
+    return x, y
+
+
+def round_hex(q, r):
+    """Округление осевых координат шестиугольной сетки до ближайшей
+    клетки (через кубические координаты q + r + s = 0)"""
+    s = -q - r
+    round_q, round_r, round_s = round(q), round(r), round(s)
+    dq, dr, ds = abs(round_q - q), abs(round_r - r), abs(round_s - s)
+    if dq > dr and dq > ds:
+        round_q = -round_r - round_s
+    elif dr > ds:
+        round_r = -round_q - round_s
+    return round_q, round_r
+
+
+def get_cell_at(x, y, size, radius):
+    """Клетка (i, j), в шестиугольник которой попадает точка экрана,
+    или None. Строка клетки - осевая координата r, в верхней половине
+    ромба q = j - i, в нижней q = j - size + 1"""
+    row = (y - (1 + 1 / sin60) * radius) / (1.5 * radius)
+    column = (x - radius * (sin60 * size + 1)) / (2 * radius * sin60) - \
+        row / 2
+    q, i = round_hex(column, row)
+    j = q + i if i < size else q + size - 1
+    if ((0 <= j <= i < size) or
+            (size <= i < 2 * size - 1 and 0 <= j < 2 * size - i - 1)):
+        return i, j
+    return None